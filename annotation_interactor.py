@@ -19,20 +19,11 @@ class AnnotationInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         interactor = self.GetInteractor()
         mouse_position = interactor.GetEventPosition()
 
-        picker = vtk.vtkCellPicker()
-        picker.SetTolerance(0.001)
-        picker.Pick(
-            mouse_position[0],
-            mouse_position[1],
-            0,
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer(),
-        )
-
-        if picker.GetCellId() >= 0:
-            picked_position = picker.GetPickPosition()
+        picked_position = self.window.picking.pick(*mouse_position)
+        if picked_position is not None:
             self.add_annotation(picked_position, mouse_position)
 
-        self.vtk_widget.GetRenderWindow().Render()
+        self.window.render_scheduler.request_render()
     def add_annotation(self, position, click_position):
         annotation_text = self.window.annotation_text_edit.toPlainText()
 
@@ -46,9 +37,7 @@ class AnnotationInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
             annotation_actor.SetVisibility(True)
 
             # Get the model's bounding box
-            mapper = self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().GetActors().GetLastActor().GetMapper()
-            mapper.Update()
-            bounds = mapper.GetBounds()
+            bounds = self.window.picking.actor.GetBounds()
 
             # Calculate the distance from the clicked position to the left and right sides of the bounding box
             distance_left = abs(click_position[0] - bounds[0])
@@ -63,9 +52,7 @@ class AnnotationInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
             annotation_actor.SetPosition(annotation_position)
 
             self.annotation_actors.append(annotation_actor)
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().AddActor(
-                annotation_actor
-            )
+            self.window.scene_layers.annotations.add(annotation_actor)
 
             # Create a line between the text and the picked position
             line_source = vtk.vtkLineSource()
@@ -81,9 +68,7 @@ class AnnotationInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
             line_actor.GetProperty().SetLineWidth(4.0)    # Set the line width to 4 pixels
 
             self.line_actors.append(line_actor)
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().AddActor(
-                line_actor
-            )
+            self.window.scene_layers.annotations.add(line_actor)
 
             self.window.annotation_text_edit.clear()
 
@@ -0,0 +1,166 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_VIEWS = ["bottom", "top", "right", "left"]
+
+
+def find_stl_files(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.stl")
+    files = glob.glob(pattern)
+    # glob is case sensitive on Linux, pick up .STL exports as well
+    if pattern.endswith(".stl"):
+        files += glob.glob(pattern[:-4] + ".STL")
+    return sorted(set(files))
+
+
+def report_names(files):
+    # One PDF per file. A name taken twice, by a.stl and a.STL or by the same
+    # name in two folders, gets a number. Compared case-insensitively, as
+    # Windows would.
+    names = {}
+    used = set()
+    for file_path in files:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        name = stem
+        number = 2
+        while name.lower() in used:
+            name = f"{stem}-{number}"
+            number += 1
+        used.add(name.lower())
+        names[file_path] = name + ".pdf"
+    return names
+
+
+def process_file(file_path, output_dir, width, height, views=DEFAULT_VIEWS, pdf_name=None):
+    import vtk
+
+    from bound_rect import SizeOverlay
+    from custom_pdf import write_views_pdf
+    from materials import DEFAULT_METAL, apply_metal_material, load_metals, metal_color
+    from mesh_loader import load_mesh
+    from offscreen_renderer import OffscreenRenderer
+    from shading import compute_smooth_normals
+    from weight import format_weight_text, get_weight_text
+
+    start_time = time.time()
+    mesh_data = load_mesh(file_path)
+    metals = load_metals()
+    weights = get_weight_text(file_path, mesh_data=mesh_data, metals=metals)
+    properties = mesh_data.mass_properties
+
+    # Build the same scene the viewer shows: model, size box and weight table
+    offscreen = OffscreenRenderer(width, height)
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(compute_smooth_normals(mesh_data.polydata))
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    # Same color the viewer starts with
+    apply_metal_material(actor, metal_color(metals, DEFAULT_METAL))
+    offscreen.add_actor(actor)
+
+    size_overlay = SizeOverlay()
+    size_overlay.set_polydata(mesh_data.polydata)
+    for size_actor in size_overlay.actors():
+        offscreen.add_actor(size_actor)
+    weight_text = offscreen.add_text(format_weight_text(weights, properties), (0.8, 0.95))
+    weight_text.GetTextProperty().SetVerticalJustificationToTop()
+    offscreen.reset_camera()
+
+    # Render the views of the PDF export and lay them out on one page
+    if pdf_name is None:
+        pdf_name = os.path.splitext(os.path.basename(file_path))[0] + ".pdf"
+    pdf_path = os.path.join(output_dir, pdf_name)
+    write_views_pdf(pdf_path, offscreen.render_views(views))
+
+    row = {
+        "file": file_path,
+        "pdf": pdf_path,
+        "volume_mm3": properties.volume,
+        "area_mm2": properties.area,
+        "watertight": properties.watertight,
+    }
+    row.update(weights)
+    row["seconds"] = round(time.time() - start_time, 3)
+    return row
+
+
+def write_summary(rows, output_dir):
+    json_path = os.path.join(output_dir, "summary.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+
+    # The CSV gets every column that appears in any row
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    csv_path = os.path.join(output_dir, "summary.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return csv_path, json_path
+
+
+def run_batch(files, output_dir, workers=None, width=1200, height=800, views=DEFAULT_VIEWS):
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    pdf_names = report_names(files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_file, file_path, output_dir, width, height, views, pdf_names[file_path]): file_path
+            for file_path in files
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                row = future.result()
+                print(f"Done: {file_path} ({row['seconds']} s)")
+            except Exception as ex:
+                row = {"file": file_path, "error": str(ex)}
+                print(f"Failed: {file_path}: {ex}")
+            rows.append(row)
+
+    # Keep the summary in input order no matter which file finished first
+    order = {file_path: index for index, file_path in enumerate(files)}
+    rows.sort(key=lambda row: order[row["file"]])
+    return write_summary(rows, output_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute weights and render PDF reports for a batch of STL files"
+    )
+    parser.add_argument("input", help="directory with STL files or a glob pattern")
+    parser.add_argument("-o", "--output", default="reports", help="output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--width", type=int, default=1200, help="width of the rendered views")
+    parser.add_argument("--height", type=int, default=800, help="height of the rendered views")
+    parser.add_argument(
+        "--views",
+        default=",".join(DEFAULT_VIEWS),
+        help="comma separated views: top, bottom, left, right, front, back, iso",
+    )
+    args = parser.parse_args()
+    views = [view.strip() for view in args.views.split(",") if view.strip()]
+
+    files = find_stl_files(args.input)
+    if not files:
+        parser.error(f"no STL files found for {args.input}")
+
+    print(f"Processing {len(files)} files")
+    csv_path, json_path = run_batch(
+        files, args.output, args.workers, args.width, args.height, views
+    )
+    print(f"Summary written to {csv_path} and {json_path}")
+
+
+if __name__ == "__main__":
+    main()
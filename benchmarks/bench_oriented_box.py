@@ -0,0 +1,81 @@
+import argparse
+import time
+
+import numpy as np
+
+from mesh_loader import load_mesh
+from oriented_box import CHUNK_SIZE, oriented_bounding_box
+
+
+def random_rotations(count, seed=0):
+    # Uniform rotations from random unit quaternions
+    q = np.random.default_rng(seed).normal(size=(count, 4))
+    q /= np.linalg.norm(q, axis=1)[:, None]
+    w, x, y, z = q.T
+    return np.stack(
+        (
+            np.column_stack((1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w))),
+            np.column_stack((2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w))),
+            np.column_stack((2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y))),
+        ),
+        axis=1,
+    )
+
+
+def brute_force_box(points, rotations):
+    # Every candidate frame is tried on every vertex
+    lower = np.full((len(rotations), 3), np.inf)
+    upper = np.full((len(rotations), 3), -np.inf)
+    frames = rotations.reshape(-1, 3).astype(points.dtype)
+    for start in range(0, len(points), CHUNK_SIZE):
+        projection = (frames @ points[start:start + CHUNK_SIZE].T).reshape(len(rotations), 3, -1)
+        lower = np.minimum(lower, projection.min(axis=2))
+        upper = np.maximum(upper, projection.max(axis=2))
+    volumes = np.prod(upper - lower, axis=1)
+    best = int(np.argmin(volumes))
+    return np.sort(upper[best] - lower[best])[::-1]
+
+
+def rotated_box(count, sizes, seed=1):
+    # Points filling a box of known size at a random orientation
+    rng = np.random.default_rng(seed)
+    points = (rng.uniform(-0.5, 0.5, (count, 3)) * sizes) @ random_rotations(1, seed)[0].T
+    return points.astype(np.float32)
+
+
+def report(name, points, rotations):
+    start = time.perf_counter()
+    _, _, extents = oriented_bounding_box(points)
+    hull_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    brute = brute_force_box(points, rotations)
+    brute_seconds = time.perf_counter() - start
+
+    axis_aligned = np.ptp(points, axis=0)
+    print(f"{name}: {len(points)} vertices")
+    for label, sizes, seconds in (
+        ("axis aligned", np.sort(axis_aligned)[::-1], None),
+        ("hull + calipers", extents, hull_seconds),
+        (f"brute force x{len(rotations)}", brute, brute_seconds),
+    ):
+        timing = "" if seconds is None else f"{seconds:8.2f} s"
+        print(f"  {label:>20}: {' x '.join(f'{s:.3f}' for s in sizes):>28} mm  "
+              f"volume {np.prod(sizes):12.3f}  {timing}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oriented bounding box against brute force")
+    parser.add_argument("stl", nargs="*", default=["path_to_stl_file.stl"])
+    parser.add_argument("--rotations", type=int, default=2000, help="frames the brute force tries")
+    parser.add_argument("--box-points", type=int, default=1000000)
+    args = parser.parse_args()
+
+    rotations = random_rotations(args.rotations)
+    report("rotated 20 x 8 x 2 box", rotated_box(args.box_points, (20.0, 8.0, 2.0)), rotations)
+    for file_path in args.stl:
+        report(file_path, load_mesh(file_path).points, rotations)
+
+
+if __name__ == "__main__":
+    main()
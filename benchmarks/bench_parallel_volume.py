@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_streaming_volume import write_binary
+from mass_properties import STREAM_CHUNK_SIZE, parallel_file_mass_properties, stream_mass_properties
+from stl_reader import HEADER_SIZE, TRIANGLE_DTYPE
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def same(a, b):
+    return a.volume == b.volume and a.centroid == b.centroid and np.array_equal(a.inertia, b.inertia)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volume of a large binary STL with several worker processes")
+    parser.add_argument("stl", nargs="?", default=None, help="binary STL, a synthetic one is written if left out")
+    parser.add_argument("--triangles", type=int, default=20000000)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_path = args.stl
+        if file_path is None:
+            file_path = os.path.join(folder, "bench.stl")
+            write_binary(file_path, HEADER_SIZE + args.triangles * TRIANGLE_DTYPE.itemsize)
+        triangles = (os.path.getsize(file_path) - HEADER_SIZE) // TRIANGLE_DTYPE.itemsize
+
+        # Warm the page cache so every run reads the file from memory
+        serial, _ = timed(stream_mass_properties, file_path, args.chunk_size)
+        serial, serial_seconds = timed(stream_mass_properties, file_path, args.chunk_size)
+        print(f"{triangles} triangles, {os.cpu_count()} cores, serial stream {serial_seconds:.2f} s")
+        print(f"{'workers':>8} {'seconds':>8} {'speedup':>8} {'identical':>10}")
+
+        for workers in (int(text) for text in args.workers.split(",")):
+            result, seconds = timed(parallel_file_mass_properties, file_path, workers, args.chunk_size)
+            print(f"{workers:>8} {seconds:>8.2f} {serial_seconds / seconds:>7.2f}x {str(same(result, serial)):>10}")
+
+
+if __name__ == "__main__":
+    main()
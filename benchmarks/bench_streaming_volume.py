@@ -0,0 +1,174 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from stl_reader import HEADER_SIZE, TRIANGLE_DTYPE
+
+DEFAULT_SIZES = "10M,100M,500M,2G"
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+# Unit cube as 12 outward facing triangles
+CUBE_CORNERS = np.array(
+    [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]],
+    dtype=np.float32,
+)
+CUBE_FACES = np.array(
+    [
+        [0, 2, 1], [0, 3, 2], [4, 5, 6], [4, 6, 7], [0, 1, 5], [0, 5, 4],
+        [1, 2, 6], [1, 6, 5], [2, 3, 7], [2, 7, 6], [3, 0, 4], [3, 4, 7],
+    ]
+)
+CUBES_PER_BLOCK = 10000
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def cube_block(index):
+    # A row of separate unit cubes, every block is moved along y
+    offsets = np.zeros((CUBES_PER_BLOCK, 3), dtype=np.float32)
+    offsets[:, 0] = np.arange(CUBES_PER_BLOCK) * 2
+    offsets[:, 1] = index * 2
+    return (CUBE_CORNERS[CUBE_FACES][None] + offsets[:, None, None]).reshape(-1, 3, 3)
+
+
+def write_binary(file_path, size):
+    triangles = max((size - HEADER_SIZE) // TRIANGLE_DTYPE.itemsize // 12, 1) * 12
+    records = np.zeros(CUBES_PER_BLOCK * 12, dtype=TRIANGLE_DTYPE)
+    with open(file_path, "wb") as f:
+        f.write(b"\0" * 80)
+        f.write(np.uint32(triangles).tobytes())
+        written = 0
+        index = 0
+        while written < triangles:
+            count = min(len(records), triangles - written)
+            records["vertices"] = cube_block(index)
+            f.write(records[:count].tobytes())
+            written += count
+            index += 1
+    return triangles
+
+
+def write_ascii(file_path, size):
+    triangles = 0
+    index = 0
+    with open(file_path, "w") as f:
+        f.write("solid bench\n")
+        while f.tell() < size:
+            lines = []
+            for v0, v1, v2 in cube_block(index):
+                lines.append(
+                    "facet normal 0 0 0\n outer loop\n"
+                    f"  vertex {v0[0]} {v0[1]} {v0[2]}\n"
+                    f"  vertex {v1[0]} {v1[1]} {v1[2]}\n"
+                    f"  vertex {v2[0]} {v2[1]} {v2[2]}\n"
+                    " endloop\nendfacet\n"
+                )
+            f.write("".join(lines))
+            triangles += CUBES_PER_BLOCK * 12
+            index += 1
+        f.write("endsolid bench\n")
+    return triangles
+
+
+def peak_rss_mb():
+    if sys.platform.startswith("win"):
+        import ctypes
+        from ctypes import wintypes
+
+        # Peak working set from GetProcessMemoryInfo, no extra package needed
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / 1024 ** 2
+
+    import resource
+
+    # Linux reports kilobytes, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def measure(mode, file_path):
+    # Runs in its own process so the peak belongs to this mode and file only
+    start = time.perf_counter()
+    volume = 0.0
+    if mode == "stream":
+        from mass_properties import stream_mass_properties
+
+        volume = stream_mass_properties(file_path).volume
+    elif mode == "load":
+        from stl import mesh
+
+        # What weight.py did before: the whole file as numpy-stl arrays
+        volume = mesh.Mesh.from_file(file_path).get_mass_properties()[0]
+    print(f"{peak_rss_mb()} {volume} {time.perf_counter() - start}")
+
+
+def run(mode, file_path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming_volume", "--measure", mode, file_path],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[0]), float(output[1]), float(output[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of the streaming volume against file size")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated file sizes, e.g. 10M,2G")
+    parser.add_argument("--ascii", action="store_true", help="write ASCII files instead of binary")
+    parser.add_argument("--load-limit", default="200M", help="largest file also measured with a full load")
+    parser.add_argument("--dir", default=None, help="where the synthetic files go")
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "STL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    load_limit = parse_size(args.load_limit)
+    idle_rss = run("idle", os.devnull)[0]
+    print(f"{'ASCII' if args.ascii else 'binary'} files, interpreter with numpy: {idle_rss:.0f} MB")
+    print(f"{'file':>10} {'triangles':>11} {'stream RSS':>11} {'stream s':>9} {'load RSS':>9} {'volume ok':>10}")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as folder:
+        for text in args.sizes.split(","):
+            size = parse_size(text)
+            file_path = os.path.join(folder, "bench.stl")
+            writer = write_ascii if args.ascii else write_binary
+            triangles = writer(file_path, size)
+
+            rss, volume, seconds = run("stream", file_path)
+            load = f"{run('load', file_path)[0]:>7.0f}MB" if size <= load_limit else f"{'-':>9}"
+            # Every cube adds exactly 1 mm³
+            correct = abs(volume - triangles / 12) < 1e-6 * triangles
+            print(f"{text:>10} {triangles:>11} {rss:>9.0f}MB {seconds:>9.2f} {load} {str(correct):>10}")
+            os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
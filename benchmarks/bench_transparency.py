@@ -0,0 +1,85 @@
+import argparse
+import statistics
+import time
+
+import vtk
+
+from lod import build_lod_levels
+from materials import apply_metal_material
+from mesh_loader import load_mesh
+from transparency import TransparencyController
+
+OPACITIES = (1.0, 0.75, 0.5, 0.25)
+
+
+def frame_times(render_window, renderer, frames):
+    # Orbit the camera a little each frame so nothing can be reused
+    render_window.Render()
+    times = []
+    for _ in range(frames):
+        renderer.GetActiveCamera().Azimuth(360.0 / frames)
+        start = time.perf_counter()
+        render_window.Render()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame time of the transparency modes")
+    parser.add_argument("stl", nargs="?", default="path_to_stl_file.stl")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=800)
+    parser.add_argument("--proxy", type=float, default=0.25, help="share of triangles kept by the moving proxy")
+    parser.add_argument("--target-fps", type=float, default=15.0)
+    args = parser.parse_args()
+
+    mesh_data = load_mesh(args.stl)
+    polydata = mesh_data.polydata
+    triangle_count = polydata.GetNumberOfCells()
+    proxy = build_lod_levels(polydata, (int(triangle_count * args.proxy),))
+    proxy = proxy[0] if proxy else polydata
+
+    render_window = vtk.vtkRenderWindow()
+    render_window.SetOffScreenRendering(1)
+    render_window.SetSize(args.width, args.height)
+    renderer = vtk.vtkRenderer()
+    render_window.AddRenderer(renderer)
+    mapper = vtk.vtkPolyDataMapper()
+    mapper.SetInputData(polydata)
+    actor = vtk.vtkActor()
+    actor.SetMapper(mapper)
+    apply_metal_material(actor, (0.91, 0.76, 0.29))
+    renderer.AddActor(actor)
+    renderer.ResetCamera()
+
+    transparency = TransparencyController(renderer, mode="quality")
+    budget = 1000.0 / args.target_fps
+    print(f"{args.stl}: {triangle_count} triangles, proxy {proxy.GetNumberOfCells()}, "
+          f"{args.width}x{args.height}, budget {budget:.1f} ms per moving frame")
+    print(f"{'opacity':>8} {'still blend':>12} {'still peel':>12} {'moving proxy':>13}")
+
+    for opacity in OPACITIES:
+        actor.GetProperty().SetOpacity(opacity)
+        transparency.set_opacity(opacity)
+
+        # Still frames in both modes, always at full resolution
+        transparency.set_mode("fast")
+        blend = frame_times(render_window, renderer, args.frames)
+        transparency.set_mode("quality")
+        transparency.still_budget = float("inf")
+        peel = frame_times(render_window, renderer, args.frames) if opacity < 1.0 else blend
+
+        # What the viewer draws while the camera moves
+        transparency.on_start_interaction(None, None)
+        mapper.SetInputData(proxy)
+        moving = frame_times(render_window, renderer, args.frames)
+        mapper.SetInputData(polydata)
+        transparency.on_end_interaction(None, None)
+
+        flag = "" if moving <= budget else "  over budget"
+        print(f"{opacity:>8.2f} {blend:>10.1f}ms {peel:>10.1f}ms {moving:>11.1f}ms{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_streaming_volume import peak_rss_mb
+from stl_reader import HEADER_SIZE, TRIANGLE_DTYPE
+
+
+def write_grid(file_path, triangles):
+    # A wavy square sheet, every inner vertex is shared by six triangles like
+    # on a real scan. Written a band of rows at a time.
+    side = int(np.sqrt(triangles / 2)) + 1
+    x = np.arange(side, dtype=np.float32)
+    count = 2 * (side - 1) ** 2
+    with open(file_path, "wb") as f:
+        f.write(b"\0" * 80)
+        f.write(np.uint32(count).tobytes())
+        for row in range(0, side - 1, 100):
+            y = np.arange(row, min(row + 101, side), dtype=np.float32)
+            z = np.sin(x[None, :] / 40) * np.cos(y[:, None] / 35) * 20
+            grid = np.stack(np.broadcast_arrays(x[None, :], y[:, None], z), axis=-1)
+            a, b = grid[:-1, :-1], grid[:-1, 1:]
+            c, d = grid[1:, :-1], grid[1:, 1:]
+            records = np.zeros((len(a), side - 1, 2), dtype=TRIANGLE_DTYPE)
+            records["vertices"][:, :, 0] = np.stack((a, b, d), axis=2)
+            records["vertices"][:, :, 1] = np.stack((a, d, c), axis=2)
+            f.write(records.tobytes())
+    return count
+
+
+def measure(mode, file_path):
+    # Runs in its own process so the peak belongs to this mode and file only,
+    # every mode imports VTK so the idle run can be subtracted
+    import vtk
+
+    start = time.perf_counter()
+    mesh_mb = 0.0
+    if mode == "load":
+        from mesh_loader import load_mesh
+
+        mesh_data = load_mesh(file_path)
+        mesh_mb = (mesh_data.points.nbytes + mesh_data.faces.nbytes + mesh_data.normals.nbytes) / 1024 ** 2
+    elif mode == "vtk":
+        reader = vtk.vtkSTLReader()
+        reader.SetFileName(file_path)
+        reader.Update()
+    print(f"{peak_rss_mb()} {mesh_mb} {time.perf_counter() - start}")
+
+
+def run(mode, file_path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_weld_memory", "--measure", mode, file_path],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[0]), float(output[1]), float(output[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of loading and welding a binary STL")
+    parser.add_argument("stl", nargs="?", default=None, help="binary STL, a synthetic one is written if left out")
+    parser.add_argument("--triangles", type=int, default=3000000)
+    parser.add_argument("--measure", nargs=2, metavar=("MODE", "STL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        file_path = args.stl
+        if file_path is None:
+            file_path = os.path.join(folder, "bench.stl")
+            write_grid(file_path, args.triangles)
+        triangles = (os.path.getsize(file_path) - HEADER_SIZE) // TRIANGLE_DTYPE.itemsize
+
+        # Peaks are given above the interpreter with numpy and VTK loaded
+        idle_rss = run("idle", file_path)[0]
+        load_rss, mesh_mb, load_seconds = run("load", file_path)
+        vtk_rss, _, vtk_seconds = run("vtk", file_path)
+        print(f"{triangles} triangles, indexed mesh with normals {mesh_mb:.0f} MB, interpreter {idle_rss:.0f} MB")
+        print(f"{'reader':>14} {'peak RSS':>9} {'seconds':>8}")
+        print(f"{'load_mesh':>14} {load_rss - idle_rss:>7.0f}MB {load_seconds:>8.2f}")
+        print(f"{'vtkSTLReader':>14} {vtk_rss - idle_rss:>7.0f}MB {vtk_seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
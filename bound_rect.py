@@ -1,134 +1,91 @@
+import numpy as np
 import vtk
-
-
-def draw_bound_rect(reader, renderer):
-    bounds = reader.GetOutput().GetBounds()
-    # Calculate x, y, and z sizes
-    x_size = bounds[1] - bounds[0]
-    y_size = bounds[3] - bounds[2]
-    z_size = bounds[5] - bounds[4]
-
-    # Create a box representing the bounding box of the STL model
-    box = vtk.vtkPolyData()
-    points = vtk.vtkPoints()
-    points.InsertNextPoint(bounds[0], bounds[2], bounds[4])  # vertex 0
-    points.InsertNextPoint(bounds[1], bounds[2], bounds[4])  # vertex 1
-    points.InsertNextPoint(bounds[1], bounds[3], bounds[4])  # vertex 2
-    points.InsertNextPoint(bounds[0], bounds[3], bounds[4])  # vertex 3
-    points.InsertNextPoint(bounds[0], bounds[2], bounds[5])  # vertex 4
-    points.InsertNextPoint(bounds[1], bounds[2], bounds[5])  # vertex 5
-    points.InsertNextPoint(bounds[1], bounds[3], bounds[5])  # vertex 6
-    points.InsertNextPoint(bounds[0], bounds[3], bounds[5])  # vertex 7
-
-    box.SetPoints(points)
-
-    # Create lines connecting the vertices
-    lines = vtk.vtkCellArray()
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(0)
-    lines.InsertCellPoint(1)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(1)
-    lines.InsertCellPoint(2)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(2)
-    lines.InsertCellPoint(3)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(3)
-    lines.InsertCellPoint(0)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(4)
-    lines.InsertCellPoint(5)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(5)
-    lines.InsertCellPoint(6)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(6)
-    lines.InsertCellPoint(7)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(7)
-    lines.InsertCellPoint(4)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(0)
-    lines.InsertCellPoint(4)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(1)
-    lines.InsertCellPoint(5)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(2)
-    lines.InsertCellPoint(6)
-
-    lines.InsertNextCell(2)
-    lines.InsertCellPoint(3)
-    lines.InsertCellPoint(7)
-
-    box.SetLines(lines)
-
-    # Step 3: Visualize the STL model and the box
-    mapper = vtk.vtkPolyDataMapper()
-    if vtk.VTK_MAJOR_VERSION <= 5:
-        mapper.SetInput(box)
-    else:
-        mapper.SetInputData(box)
-
-    actor = vtk.vtkActor()
-    actor.SetMapper(mapper)
-    annotation_text = add_annotations(
-        renderer=renderer, x_size=x_size, y_size=y_size, z_size=z_size, box=box
-    )
-    return actor, annotation_text
-
-    # Set up camera
-    # renderer.GetActiveCamera().SetPosition(x_size / 2, y_size / 2, z_size * 2)
-    # renderer.GetActiveCamera().SetFocalPoint(x_size / 2, y_size / 2, (z_size / 2) + bounds[4])
-
-
-def add_annotations(renderer, x_size, y_size, z_size, box):
-    # Initialize traversal of the lines in the box
-    lines = box.GetLines()
-    lines.InitTraversal()
-
-    cell_array = vtk.vtkIdList()
-    l = []
-    while lines.GetNextCell(cell_array):
-        annotation_text = vtk.vtkBillboardTextActor3D()
-        annotation_text.GetTextProperty().SetColor(1.0, 1.0, 0)  # Yellow color
-        annotation_text.GetTextProperty().SetFontSize(16)
-        ptId1 = cell_array.GetId(0)
-        ptId2 = cell_array.GetId(1)
-
-        # Calculate the midpoint of the line
-        mid_point = [sum(p) / 2 for p in zip(box.GetPoint(ptId1), box.GetPoint(ptId2))]
-
-        # Determine the corresponding size based on line connectivity
-        size = 0.0
-        if (ptId1 == 0 and ptId2 == 1) or (ptId1 == 2 and ptId2 == 3):
-            size = x_size
-        elif (ptId1 == 1 and ptId2 == 2) or (ptId1 == 3 and ptId2 == 0):
-            size = y_size
-        elif (ptId1 == 4 and ptId2 == 5) or (ptId1 == 6 and ptId2 == 7):
-            size = x_size
-        elif (ptId1 == 5 and ptId2 == 6) or (ptId1 == 7 and ptId2 == 4):
-            size = y_size
-        elif (
-            (ptId1 == 0 and ptId2 == 4)
-            or (ptId1 == 1 and ptId2 == 5)
-            or (ptId1 == 2 and ptId2 == 6)
-            or (ptId1 == 3 and ptId2 == 7)
-        ):
-            size = z_size
-
-        annotation_text.SetInput("%.2f mm" % size)
-        annotation_text.SetPosition(mid_point[0], mid_point[1], mid_point[2]) 
-        l.append(annotation_text)       
-    return l
+from vtk.util import numpy_support
+
+# Corners 0-3 go around the bottom face of the box, 4-7 around the top one
+BOX_SIGNS = np.array(
+    [
+        [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+        [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+    ],
+    dtype=np.float64,
+)
+BOX_EDGES = np.array(
+    [[0, 1], [1, 2], [2, 3], [3, 0], [4, 5], [5, 6], [6, 7], [7, 4], [0, 4], [1, 5], [2, 6], [3, 7]]
+)
+# One edge along each box axis carries the size label
+LABEL_EDGES = BOX_EDGES[[0, 1, 8]]
+
+
+def box_corners(center, axes, extents):
+    # axes holds one unit vector per row, extents the full edge lengths
+    half = np.asarray(extents, dtype=np.float64) / 2.0
+    return np.asarray(center, dtype=np.float64) + (BOX_SIGNS * half) @ np.asarray(axes, dtype=np.float64)
+
+
+class SizeOverlay:
+    # The size box of the model: one line polydata for the 12 edges and one
+    # label mapper for the 3 sizes, both updated in place for a new model
+    def __init__(self):
+        self.corners = np.zeros((8, 3))
+        self.points = vtk.vtkPoints()
+        self.points.SetData(numpy_support.numpy_to_vtk(self.corners, deep=False))
+        lines = vtk.vtkCellArray()
+        lines.SetData(
+            numpy_support.numpy_to_vtk(np.arange(0, 25, 2), deep=True, array_type=vtk.VTK_ID_TYPE),
+            numpy_support.numpy_to_vtk(BOX_EDGES.ravel(), deep=True, array_type=vtk.VTK_ID_TYPE),
+        )
+        self.polydata = vtk.vtkPolyData()
+        self.polydata.SetPoints(self.points)
+        self.polydata.SetLines(lines)
+
+        self.label_positions = np.zeros((3, 3))
+        self.label_points = vtk.vtkPoints()
+        self.label_points.SetData(numpy_support.numpy_to_vtk(self.label_positions, deep=False))
+        self.labels = vtk.vtkStringArray()
+        self.labels.SetName("Labels")
+        self.labels.SetNumberOfValues(3)
+        self.label_polydata = vtk.vtkPolyData()
+        self.label_polydata.SetPoints(self.label_points)
+        self.label_polydata.GetPointData().AddArray(self.labels)
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputData(self.polydata)
+        self.box_actor = vtk.vtkActor()
+        self.box_actor.SetMapper(mapper)
+
+        label_mapper = vtk.vtkLabeledDataMapper()
+        label_mapper.SetInputData(self.label_polydata)
+        label_mapper.SetLabelModeToLabelFieldData()
+        label_mapper.SetFieldDataName("Labels")
+        label_mapper.GetLabelTextProperty().SetColor(1.0, 1.0, 0)  # Yellow color
+        label_mapper.GetLabelTextProperty().SetFontSize(16)
+        label_mapper.GetLabelTextProperty().ShadowOff()
+        self.label_actor = vtk.vtkActor2D()
+        self.label_actor.SetMapper(label_mapper)
+
+        self.sizes = (0.0, 0.0, 0.0)
+
+    def actors(self):
+        return self.box_actor, self.label_actor
+
+    def set_bounds(self, bounds):
+        lower = np.array(bounds[0::2], dtype=np.float64)
+        upper = np.array(bounds[1::2], dtype=np.float64)
+        self.set_box((lower + upper) / 2.0, np.eye(3), upper - lower)
+
+    def set_box(self, center, axes, extents):
+        self.corners[:] = box_corners(center, axes, extents)
+        self.label_positions[:] = self.corners[LABEL_EDGES].mean(axis=1)
+        self.sizes = tuple(float(size) for size in extents)
+        for index, size in enumerate(self.sizes):
+            self.labels.SetValue(index, "%.2f mm" % size)
+
+        self.points.Modified()
+        self.label_points.Modified()
+        self.labels.Modified()
+        self.polydata.Modified()
+        self.label_polydata.Modified()
+
+    def set_polydata(self, polydata):
+        self.set_bounds(polydata.GetBounds())
@@ -1,5 +1,13 @@
+import math
+import zlib
+
+import numpy as np
 from fpdf import FPDF
 
+# A4 landscape in millimetres
+PAGE_WIDTH = 297
+PAGE_HEIGHT = 210
+
 
 class CustomPDF(FPDF):
     def header(self):
@@ -7,3 +15,45 @@ class CustomPDF(FPDF):
 
     def footer(self):
         pass
+
+    def image_array(self, pixels, x, y, w, h):
+        # Register raw RGB pixels the same way image() registers a parsed
+        # PNG, so no temporary file is needed. This relies on the internals
+        # of fpdf 1.7, which the Pipfile pins.
+        name = f"array_image_{len(self.images)}"
+        height, width = pixels.shape[:2]
+        self.images[name] = {
+            "i": len(self.images) + 1,
+            "w": width,
+            "h": height,
+            "cs": "DeviceRGB",
+            "bpc": 8,
+            "f": "FlateDecode",
+            "data": zlib.compress(np.ascontiguousarray(pixels[:, :, :3]).tobytes()),
+        }
+        self.image(name, x=x, y=y, w=w, h=h)
+
+
+def views_layout(count):
+    # Fill the page with an as-square-as-possible grid of views
+    columns = int(math.ceil(math.sqrt(count)))
+    rows = int(math.ceil(count / columns))
+    cell_width = PAGE_WIDTH / columns
+    cell_height = PAGE_HEIGHT / rows
+    positions = [
+        ((index % columns) * cell_width, (index // columns) * cell_height)
+        for index in range(count)
+    ]
+    return positions, cell_width, cell_height
+
+
+def write_views_pdf(file_path, images):
+    pdf = CustomPDF(orientation="L", unit="mm", format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    positions, cell_width, cell_height = views_layout(len(images))
+    for pixels, (x, y) in zip(images, positions):
+        # Add the image scaled to its cell of the page
+        pdf.image_array(pixels, x, y, cell_width, cell_height)
+    pdf.output(file_path)
@@ -9,16 +9,29 @@ class DrawingInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         self.AddObserver("MouseMoveEvent", self.mouse_move_event)
         self.vtk_widget = vtk_widget
         self.drawing = False
-        self.line_points = []
-        self.drawing_actors = []
+        self.stroke_started = False
+
+        # Every stroke is one polyline cell of a single polydata, the point
+        # and cell arrays grow in place as the mouse moves
+        self.stroke_points = vtk.vtkPoints()
+        self.stroke_lines = vtk.vtkCellArray()
+        self.stroke_polydata = vtk.vtkPolyData()
+        self.stroke_polydata.SetPoints(self.stroke_points)
+        self.stroke_polydata.SetLines(self.stroke_lines)
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputData(self.stroke_polydata)
+        self.stroke_actor = vtk.vtkActor()
+        self.stroke_actor.SetMapper(mapper)
+        self.stroke_actor.GetProperty().SetColor(0.0, 0.0, 1.0)  # Blue color
+        self.stroke_actor.GetProperty().SetLineWidth(2)  # Adjust line width as needed
 
     def left_button_press_event(self, obj, event):
         if not self.window.drawing_button.isChecked():
             super().OnLeftButtonDown()
             return
 
-        interactor = self.GetInteractor()
-        self.line_points.clear()
+        self.stroke_started = False
         self.drawing = True
 
     def left_button_release_event(self, obj, event):
@@ -27,8 +40,8 @@ class DrawingInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
             return
 
         self.drawing = False
+        self.stroke_started = False
         self.draw_line()
-        self.line_points.clear()
 
     def mouse_move_event(self, obj, event):
         if not self.window.drawing_button.isChecked() or not self.drawing:
@@ -37,47 +50,45 @@ class DrawingInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
 
         interactor = self.GetInteractor()
         mouse_position = interactor.GetEventPosition()
-        picker = vtk.vtkCellPicker()
-        picker.SetTolerance(0.001)
-        picker.Pick(
-            mouse_position[0],
-            mouse_position[1],
-            0,
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer(),
-        )
-
-        if picker.GetCellId() >= 0:
-            picked_position = picker.GetPickPosition()
-            self.line_points.append(picked_position)
+        picked_position = self.window.picking.pick(*mouse_position)
+        if picked_position is not None:
+            self.add_stroke_point(picked_position)
             self.draw_line()
 
-    def draw_line(self):
-        if len(self.line_points) < 2:
-            return
+    def add_stroke_point(self, position):
+        # Loading a model clears the scene, old strokes go with it
+        layer = self.window.scene_layers.drawings
+        if self.stroke_actor not in layer:
+            self.reset_strokes()
+            layer.add(self.stroke_actor)
 
-        # Create a line between the points
-        line_source = vtk.vtkLineSource()
-        line_source.SetPoint1(self.line_points[-2])
-        line_source.SetPoint2(self.line_points[-1])
-        line_source.Update()
+        point_id = self.stroke_points.InsertNextPoint(position)
+        connectivity = self.stroke_lines.GetConnectivityArray()
+        offsets = self.stroke_lines.GetOffsetsArray()
+        connectivity.InsertNextValue(point_id)
+        if self.stroke_started:
+            # Extend the last polyline, its end offset moves by one
+            offsets.SetValue(offsets.GetNumberOfValues() - 1, connectivity.GetNumberOfValues())
+        else:
+            offsets.InsertNextValue(connectivity.GetNumberOfValues())
+            self.stroke_started = True
 
-        # Create a mapper and actor for the line
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(line_source.GetOutput())
+        self.stroke_points.Modified()
+        self.stroke_lines.Modified()
+        self.stroke_polydata.Modified()
 
-        line_actor = vtk.vtkActor()
-        line_actor.SetMapper(mapper)
-        line_actor.GetProperty().SetColor(0.0, 0.0, 1.0)  # Blue color
-        line_actor.GetProperty().SetLineWidth(2)  # Adjust line width as needed
+    def draw_line(self):
+        # Mouse moves only ask for a frame, the scheduler coalesces them
+        self.window.render_scheduler.request_render()
 
-        # Add the line actor to the renderer
-        self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().AddActor(line_actor)
-        self.drawing_actors.append(line_actor)
-        self.vtk_widget.GetRenderWindow().Render()
+    def reset_strokes(self):
+        self.stroke_points.Reset()
+        self.stroke_lines.Reset()
+        self.stroke_started = False
+        self.stroke_points.Modified()
+        self.stroke_polydata.Modified()
 
     def clear_drawings(self):
-        # Remove all drawing actors from the renderer
-        for actor in self.drawing_actors:
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().RemoveActor(actor)
-        self.drawing_actors.clear()
-        self.vtk_widget.GetRenderWindow().Render()
+        # Remove all strokes in one go
+        self.reset_strokes()
+        self.draw_line()
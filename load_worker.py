@@ -0,0 +1,95 @@
+from PyQt5 import QtCore
+
+from mesh_loader import LoadCancelled, load_mesh
+from mesh_validation import repair_mesh_data, validate_mesh
+from weight import get_weight_text
+
+
+class MeshLoadWorker(QtCore.QThread):
+    progress_changed = QtCore.pyqtSignal(int)
+    preview_ready = QtCore.pyqtSignal(object)
+    mesh_ready = QtCore.pyqtSignal(object, object)
+    load_failed = QtCore.pyqtSignal(str)
+    load_cancelled = QtCore.pyqtSignal()
+
+    # Share of the progress bar used by reading the file, the rest covers welding and weight
+    READ_PROGRESS = 80
+
+    def __init__(self, file_path, mesh_cache=None, metals=None, auto_repair=False, parent=None):
+        super(MeshLoadWorker, self).__init__(parent)
+        self.file_path = file_path
+        self.mesh_cache = mesh_cache
+        self.metals = metals
+        self.auto_repair = auto_repair
+
+    def run(self):
+        try:
+            mesh_data = None
+            if self.mesh_cache is not None:
+                mesh_data = self.mesh_cache.load_mesh(self.file_path)
+            from_cache = mesh_data is not None
+            # Entries stored before the mesh was weighed get the sums added
+            store_mass_properties = from_cache and mesh_data.mass_properties is None
+
+            if not from_cache:
+                mesh_data = load_mesh(
+                    self.file_path,
+                    progress=self._report_read_progress,
+                    on_preview=self._report_preview,
+                )
+            self._check_cancelled()
+            self.progress_changed.emit(90)
+
+            if self.auto_repair:
+                # The weight is computed on the repaired mesh, the cache
+                # keeps the mesh as it is in the file
+                report = validate_mesh(mesh_data.points, mesh_data.faces)
+                self._check_cancelled()
+                if not report.valid:
+                    if not from_cache:
+                        self._store(mesh_data)
+                        from_cache = True
+                    mesh_data = repair_mesh_data(mesh_data)
+                    store_mass_properties = False
+                    self._check_cancelled()
+
+            weights = get_weight_text(self.file_path, mesh_data=mesh_data, metals=self.metals)
+            self._check_cancelled()
+
+            # Keep the processed mesh for the next time this file is opened
+            if not from_cache:
+                self._store(mesh_data)
+            elif store_mass_properties and self.mesh_cache is not None:
+                try:
+                    self.mesh_cache.store_mass_properties(self.file_path, mesh_data.mass_properties)
+                except OSError as ex:
+                    print(f"Could not cache {self.file_path}: {ex}")
+            self.progress_changed.emit(100)
+            self.mesh_ready.emit(mesh_data, weights)
+        except LoadCancelled:
+            self.load_cancelled.emit()
+        except Exception as ex:
+            self.load_failed.emit(str(ex))
+
+    def _store(self, mesh_data):
+        if self.mesh_cache is None:
+            return
+        try:
+            self.mesh_cache.store_mesh(mesh_data)
+        except OSError as ex:
+            print(f"Could not cache {self.file_path}: {ex}")
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def _check_cancelled(self):
+        if self.isInterruptionRequested():
+            raise LoadCancelled()
+
+    def _report_read_progress(self, bytes_read, total_bytes):
+        self._check_cancelled()
+        self.progress_changed.emit(int(bytes_read * self.READ_PROGRESS / max(total_bytes, 1)))
+
+    def _report_preview(self, polydata):
+        self._check_cancelled()
+        self.preview_ready.emit(polydata)
@@ -0,0 +1,131 @@
+import vtk
+from PyQt5 import QtCore
+
+# Triangle budgets of the coarse versions, finest first
+LOD_TRIANGLE_COUNTS = (1000000, 250000, 50000)
+
+
+def iter_lod_levels(polydata, triangle_counts=LOD_TRIANGLE_COUNTS, decimate=None):
+    if decimate is None:
+        decimate = vtk.vtkQuadricDecimation()
+    decimate.VolumePreservationOn()
+
+    source = polydata
+    for count in triangle_counts:
+        source_count = source.GetNumberOfCells()
+        # Skip levels that would not at least halve the previous one
+        if count * 2 > source_count:
+            continue
+
+        # Decimate from the previous level, each pass works on a smaller mesh
+        decimate.SetInputData(source)
+        decimate.SetTargetReduction(1.0 - count / source_count)
+        decimate.Update()
+        if decimate.GetAbortExecute():
+            return
+
+        level = vtk.vtkPolyData()
+        level.ShallowCopy(decimate.GetOutput())
+        yield level
+        source = level
+
+
+def build_lod_levels(polydata, triangle_counts=LOD_TRIANGLE_COUNTS):
+    return list(iter_lod_levels(polydata, triangle_counts))
+
+
+class LodBuilder(QtCore.QThread):
+    level_ready = QtCore.pyqtSignal(object)
+    all_levels_ready = QtCore.pyqtSignal(object)
+
+    def __init__(self, polydata, parent=None):
+        super(LodBuilder, self).__init__(parent)
+        self.polydata = polydata
+        self.decimate = vtk.vtkQuadricDecimation()
+
+    def run(self):
+        # Levels are handed over one by one, finest first
+        levels = []
+        for level in iter_lod_levels(self.polydata, decimate=self.decimate):
+            if self.isInterruptionRequested():
+                return
+            levels.append(level)
+            self.level_ready.emit(level)
+        # An aborted pass ends early, its levels are not the full set
+        if self.isInterruptionRequested() or self.decimate.GetAbortExecute():
+            return
+        self.all_levels_ready.emit(levels)
+
+    def cancel(self):
+        self.requestInterruption()
+        self.decimate.SetAbortExecute(1)
+
+
+class LodController:
+    def __init__(self, renderer, target_fps=15.0):
+        self.renderer = renderer
+        self.target_fps = target_fps
+        self.actor = None
+        self.full_polydata = None
+        self.levels = []
+        self.full_render_time = 0.0
+        self.renderer.AddObserver("EndEvent", self.on_render_end)
+
+    def set_model(self, actor, levels=()):
+        self.actor = actor
+        self.full_polydata = actor.GetMapper().GetInput()
+        self.levels = list(levels)
+        self.full_render_time = 0.0
+
+    def set_full_polydata(self, polydata):
+        # Same triangles with other attributes, the measured frame time still holds
+        if self.actor is None:
+            return
+        if self.actor.GetMapper().GetInput() is self.full_polydata:
+            self.actor.GetMapper().SetInputData(polydata)
+        self.full_polydata = polydata
+
+    def add_level(self, level):
+        self.levels.append(level)
+
+    def clear(self):
+        self.actor = None
+        self.full_polydata = None
+        self.levels = []
+
+    def set_target_fps(self, target_fps):
+        self.target_fps = float(target_fps)
+
+    def watch(self, interactor_style):
+        # Trackball styles fire these around every rotate/pan/zoom/spin
+        interactor_style.AddObserver("StartInteractionEvent", self.on_start_interaction)
+        interactor_style.AddObserver("EndInteractionEvent", self.on_end_interaction)
+
+    def on_render_end(self, obj, event):
+        # Remember how long a full resolution frame takes
+        if self.actor is not None and self.actor.GetMapper().GetInput() is self.full_polydata:
+            self.full_render_time = self.renderer.GetLastRenderTimeInSeconds()
+
+    def select_level(self):
+        budget = 1.0 / self.target_fps
+        if not self.levels or self.full_render_time <= budget:
+            return self.full_polydata
+
+        # Assume render time scales with the number of triangles
+        full_count = max(self.full_polydata.GetNumberOfCells(), 1)
+        for level in self.levels:
+            estimate = self.full_render_time * level.GetNumberOfCells() / full_count
+            if estimate <= budget:
+                return level
+        return self.levels[-1]
+
+    def on_start_interaction(self, obj, event):
+        if self.actor is None:
+            return
+        self.actor.GetMapper().SetInputData(self.select_level())
+
+    def on_end_interaction(self, obj, event):
+        # The interactor style renders again right after this event
+        if self.actor is None:
+            return
+        self.actor.GetMapper().SetInputData(self.full_polydata)
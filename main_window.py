@@ -1,13 +1,27 @@
 import vtk
 from PyQt5 import QtCore, QtWidgets
-from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QAction, QFileDialog
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from PyQt5.QtWidgets import QProgressBar
 import os
-from bound_rect import draw_bound_rect
-
-from weight import get_weight_text
+from bound_rect import SizeOverlay
+
+from load_worker import MeshLoadWorker
+from materials import DEFAULT_METAL, apply_metal_material, load_metals, metal_color
+from lod import LodBuilder, LodController
+from mesh_cache import MeshCache
+from offscreen_renderer import OffscreenRenderer
+from oriented_box import OrientedBoxBuilder
+from picking import PickingService
+from render_scheduler import RenderScheduler
+from scene_layers import SceneLayers
+from shading import NormalsBuilder
+from transparency import TransparencyController
+from turntable import TurntableRecorder, turntable_camera_path
+from mesh_loader import load_mesh
+from weight import format_weight_text, get_weight_table
+from mesh_validation import MeshValidator, format_validation_text
+from tile_cache import OUT_OF_CORE_FILE_SIZE, TILE_MEMORY_BUDGET, TiledModel, TileSetWorker
 from PyQt5.QtWidgets import QCheckBox
 
 
@@ -18,10 +32,27 @@ class MainWindow(QtWidgets.QMainWindow):
             "Express CAD Service Viewer - Beta v2.0.0 support: expresscadservice@gmail.com"
         )
         self.setFixedSize(1200, 800)
-        self.rectangle_actor = None
-        self.size_annotation_text = None
+        self.size_overlay = SizeOverlay()
+        self.oriented_box_builder = None
+        self.normals_builder = None
+        self.validator = None
+        # Weight lines of the loaded model, the mesh checks are added below them
+        self.weight_text = ""
         self._image_actor = None
-        self.reader = None
+        self.mesh = None
+        # Files this big are shown as tiles streamed from disk instead
+        self.out_of_core_size = OUT_OF_CORE_FILE_SIZE
+        self.tiled_model = None
+        self.load_worker = None
+        self.lod_builder = None
+        self.turntable_recorder = None
+        self.mesh_cache = MeshCache()
+
+        # Exports render offscreen at their own resolution
+        self.offscreen = None
+        self.pdf_views = ["bottom", "top", "right", "left"]
+        self.pdf_image_width = 2048
+        self.video_size = (1280, 720)
 
         # Create a temporary folder to store images
         self.temp_folder = "temp_images"
@@ -29,17 +60,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.file_path = None
 
         # Additional variables for color and rotation
-        self.color_index = 0
-        self.colors = [
-            (0.91, 0.76, 0.29),  # 18K gold
-            (0.98, 0.84, 0.65),  # 14K gold
-            (0.81, 0.71, 0.23),  # 9K gold
-            (0.75, 0.75, 0.75),  # Silver
-            (0.68, 0.68, 0.68),  # Platinum
-            (0.86, 0.58, 0.58),  # Rose gold
-        ]
-        self.color_index = 0
-        self.metal_color = (0.91, 0.76, 0.29)
+        # The same metals are listed in the weight table, starting with 18K gold
+        self.metals = load_metals()
+        self.colors = [metal["color"] for metal in self.metals]
+        self.color_index = self.colors.index(metal_color(self.metals, DEFAULT_METAL))
+        self.metal_color = self.colors[self.color_index]
 
         # Create a VTK widget
         self.vtk_widget = QVTKRenderWindowInteractor(self)
@@ -47,7 +72,22 @@ class MainWindow(QtWidgets.QMainWindow):
         # Initialize VTK objects and rendering
         self.renderer = vtk.vtkRenderer()
         self.vtk_widget.GetRenderWindow().AddRenderer(self.renderer)
+        # Props are added through their layer, which keeps the layer's state
+        self.scene_layers = SceneLayers(self.renderer)
         self.interactor = self.vtk_widget.GetRenderWindow().GetInteractor()
+        # Handlers ask for a frame, the scheduler draws at most one per event loop pass
+        self.render_scheduler = RenderScheduler(self.vtk_widget.GetRenderWindow(), self)
+        self.default_interactor_style = vtk.vtkInteractorStyleTrackballCamera()
+        self.interactor.SetInteractorStyle(self.default_interactor_style)
+
+        # Swap in decimated versions of the model while the camera is moving
+        self.target_fps = 15
+        self.interactor.SetDesiredUpdateRate(self.target_fps)
+        self.lod_controller = LodController(self.renderer, target_fps=self.target_fps)
+        # Depth peeling for still frames only, and only while it is fast enough
+        self.transparency = TransparencyController(self.renderer)
+        # Shared by the annotation, drawing and measurement styles
+        self.picking = PickingService(self.renderer, self)
         # Connect the keypress event
         self.interactor.AddObserver("KeyPressEvent", self.on_key_press)
         # Load and render the STL file
@@ -155,6 +195,11 @@ class MainWindow(QtWidgets.QMainWindow):
         )  # Set your watermark hint
 
         self.progress_bar = QProgressBar(self.tool_pane)
+
+        # Create a button to cancel a model that is still loading
+        self.cancel_load_button = QtWidgets.QPushButton("Cancel Loading")
+        self.cancel_load_button.setVisible(False)
+        self.cancel_load_button.clicked.connect(self.cancel_loading)
         # Add buttons to the button layout
         button_layout.addWidget(self.slider)
         button_layout.addWidget(self.switch_button)
@@ -164,6 +209,7 @@ class MainWindow(QtWidgets.QMainWindow):
         button_layout.addWidget(self.annotation_button)
         button_layout.addWidget(self.annotation_text_edit)
         button_layout.addWidget(self.progress_bar)
+        button_layout.addWidget(self.cancel_load_button)
         button_layout.addStretch()
 
         # Set the layout for the tool pane
@@ -216,10 +262,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.text_actor = vtk.vtkTextActor()
         self.text_actor.SetTextScaleModeToNone()
         self.text_actor.GetPositionCoordinate().SetCoordinateSystemToNormalizedDisplay()
-        self.text_actor.SetPosition(0.8, 0.8)  # Adjust the position as needed
+        self.text_actor.SetPosition(0.8, 0.95)  # Adjust the position as needed
         self.text_actor.GetTextProperty().SetColor(0.0, 0.0, 1.0)  # Blue color
+        # The weight table grows downwards with the number of metals
+        self.text_actor.GetTextProperty().SetVerticalJustificationToTop()
         self.text_actor.GetTextProperty().SetFontSize(20)
-        self.renderer.AddActor(self.text_actor)
+        self.scene_layers.overlays.add(self.text_actor)
 
         # Create a text actor for the watermark
         self.watermark_actor = vtk.vtkTextActor()
@@ -234,7 +282,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self._add_logo()
 
-        self.renderer.AddActor(self.watermark_actor)
+        self.scene_layers.overlays.add(self.watermark_actor)
 
         # Create a button to record video
         self.record_button = QtWidgets.QPushButton("Record Video")
@@ -253,17 +301,55 @@ class MainWindow(QtWidgets.QMainWindow):
         self.video_progress_bar.setVisible(False)
         self.video_progress_bar.setRange(0, 100)
 
+        # Create a spin box for the frame rate kept while rotating the model
+        self.target_fps_spin_box = QtWidgets.QSpinBox(self.tool_pane)
+        self.target_fps_spin_box.setRange(1, 120)
+        self.target_fps_spin_box.setValue(self.target_fps)
+        self.target_fps_spin_box.setPrefix("Target FPS: ")
+        self.target_fps_spin_box.valueChanged.connect(self.on_target_fps_changed)
+        button_layout.addWidget(self.target_fps_spin_box)
+
+        # Memory the tiles of a large model may take
+        self.tile_memory_spin_box = QtWidgets.QSpinBox(self.tool_pane)
+        self.tile_memory_spin_box.setRange(64, 16384)
+        self.tile_memory_spin_box.setSingleStep(64)
+        self.tile_memory_spin_box.setValue(TILE_MEMORY_BUDGET // 1024 ** 2)
+        self.tile_memory_spin_box.setPrefix("Tile Memory: ")
+        self.tile_memory_spin_box.setSuffix(" MB")
+        self.tile_memory_spin_box.valueChanged.connect(self.on_tile_memory_changed)
+        button_layout.addWidget(self.tile_memory_spin_box)
+
+        # Pick through a cell id buffer instead of casting rays into the mesh
+        self.id_buffer_picking_checkbox = QCheckBox("ID Buffer Picking", self.tool_pane)
+        self.id_buffer_picking_checkbox.stateChanged.connect(self.on_id_buffer_picking_changed)
+        button_layout.addWidget(self.id_buffer_picking_checkbox)
+
+        # Depth peel the see-through model when it is still
+        self.quality_transparency_checkbox = QCheckBox("Quality Transparency", self.tool_pane)
+        self.quality_transparency_checkbox.stateChanged.connect(self.on_quality_transparency_changed)
+        button_layout.addWidget(self.quality_transparency_checkbox)
+
         # Create a checkbox for draw rectangle
         self.draw_rect_checkbox = QCheckBox("Display Size", self.tool_pane)
         self.draw_rect_checkbox.setChecked(True)
         self.draw_rect_checkbox.stateChanged.connect(self.on_draw_rect_checkbox_changed)
         button_layout.addWidget(self.draw_rect_checkbox)
 
-        # Create a timer to delay the update
-        self.update_timer = QtCore.QTimer()
-        self.update_timer.setInterval(500)  # Adjust the delay as needed
-        self.update_timer.setSingleShot(True)
-        self.update_timer.timeout.connect(self.update_model)
+        # Shade the model with normals interpolated across soft edges
+        self.smooth_shading_checkbox = QCheckBox("Smooth Shading", self.tool_pane)
+        self.smooth_shading_checkbox.setChecked(True)
+        self.smooth_shading_checkbox.stateChanged.connect(self.on_smooth_shading_changed)
+        button_layout.addWidget(self.smooth_shading_checkbox)
+
+        # Close holes and fix flipped or repeated triangles of the next loaded
+        # model before it is weighed
+        self.auto_repair_checkbox = QCheckBox("Auto Repair", self.tool_pane)
+        button_layout.addWidget(self.auto_repair_checkbox)
+
+        # Measure the size along the tightest rotated box instead of the axes
+        self.oriented_size_checkbox = QCheckBox("Oriented Size", self.tool_pane)
+        self.oriented_size_checkbox.stateChanged.connect(self.on_oriented_size_changed)
+        button_layout.addWidget(self.oriented_size_checkbox)
 
         self.setup_interectors()
 
@@ -271,20 +357,33 @@ class MainWindow(QtWidgets.QMainWindow):
         self.set_gold_material()
 
         # Initialize video recording variables
-        self.video_writer = None
+        self.video_encoder = None
         self.frames = []  # Store frames for video
-        self.vtk_widget.GetRenderWindow().Render()
-
-    def add_annoation_actor(self, remove=False):
-        if remove:
-            for a in self.size_annotation_text:
-                self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().RemoveActor(
-                    a
-                )
-            self.size_annotation_text = None
-        else:
-            for a in self.size_annotation_text:
-                self.renderer.AddActor(a)
+        self.render_scheduler.request_render()
+
+    def closeEvent(self, event):
+        # Stop the background workers before their window goes away
+        self.cancel_loading()
+        self.cancel_lod_builder()
+        if self.turntable_recorder is not None:
+            self.turntable_recorder.requestInterruption()
+        self.picking.clear()
+        self.cancel_oriented_box_builder()
+        self.cancel_normals_builder()
+        self.cancel_validator()
+        self.clear_tiled_model()
+        for worker in (
+            self.load_worker,
+            self.lod_builder,
+            self.turntable_recorder,
+            self.oriented_box_builder,
+            self.normals_builder,
+            self.validator,
+        ):
+            if worker is not None:
+                worker.wait()
+        self.picking.wait()
+        super(MainWindow, self).closeEvent(event)
 
     def _add_logo(self):
         # Paths for branding.txt and logo.png
@@ -344,24 +443,47 @@ class MainWindow(QtWidgets.QMainWindow):
             position.SetValue(0.05, 0.10)  # X, Y position (Bottom-left above text)
 
             # Add the logo as an overlay (Always on top)
-            self.renderer.AddActor2D(self.logo_actor)
+            self.scene_layers.overlays.add(self.logo_actor)
 
     def on_draw_rect_checkbox_changed(self, state):
-        if self.rectangle_actor is None:
+        if self.mesh is None and self.tiled_model is None:
             return
 
+        # Hide or show the box and its labels, nothing is rebuilt
         self.draw_rect = state == QtCore.Qt.Checked
-        if not self.draw_rect:
-            self.renderer.RemoveActor(self.rectangle_actor)
-            # Remove text annotation if checkbox is unchecked
-            self.remove_annotations()
-        else:
-            self._handle_size_annotations()
-            self.vtk_widget.GetRenderWindow().Render()
+        self.scene_layers.size_annotations.set_visible(self.draw_rect)
+        self.render_scheduler.request_render()
 
-    def remove_annotations(self):
-        self.add_annoation_actor(remove=True)
-        self.vtk_widget.GetRenderWindow().Render()
+    def on_oriented_size_changed(self, state):
+        if self.mesh is None:
+            return
+        self.update_size_overlay()
+        self.render_scheduler.request_render()
+
+    def update_size_overlay(self):
+        if not self.oriented_size_checkbox.isChecked():
+            self.size_overlay.set_polydata(self.mesh.polydata)
+        elif self.mesh.oriented_box is not None:
+            self.size_overlay.set_box(*self.mesh.oriented_box)
+        elif self.oriented_box_builder is None or self.oriented_box_builder.points is not self.mesh.points:
+            # The axis-aligned box stays until the oriented one is ready
+            self.size_overlay.set_polydata(self.mesh.polydata)
+            self.cancel_oriented_box_builder()
+            self.oriented_box_builder = OrientedBoxBuilder(self.mesh.points, self)
+            self.oriented_box_builder.box_ready.connect(self.on_oriented_box_ready)
+            self.oriented_box_builder.start()
+
+    def cancel_oriented_box_builder(self):
+        if self.oriented_box_builder is not None and self.oriented_box_builder.isRunning():
+            self.oriented_box_builder.requestInterruption()
+
+    def on_oriented_box_ready(self, box):
+        # Ignore the box of a model that has been replaced in the meantime
+        if self.sender() is not self.oriented_box_builder or self.mesh is None:
+            return
+        self.mesh.oriented_box = box
+        self.update_size_overlay()
+        self.render_scheduler.request_render()
 
     def on_key_press(self, obj, event):
         key = self.interactor.GetKeySym()
@@ -374,37 +496,85 @@ class MainWindow(QtWidgets.QMainWindow):
         if key == "Escape":
             self._handle_buttons_states()
 
+        if key in ("BackSpace", "Delete") and self.measurement_button.isChecked():
+            self.measurement_interactor_style.remove_last_measurement()
+
     def set_gold_material(self):
         actor = self._image_actor
+        if self.tiled_model is not None:
+            actor = self.tiled_model.material_actor
         if actor is None:
             return
 
-        # Set the actor's color to 22 K gold
-        actor.GetProperty().SetColor(
-            self.colors[self.color_index]
-        )  # RGB values for gold
-        actor.GetProperty().SetSpecular(1.0)
-        actor.GetProperty().SetSpecularPower(50)
-        actor.GetProperty().SetAmbient(0.2)
-        actor.GetProperty().SetDiffuse(0.8)
-
-        # Enable backface culling
-        actor.GetProperty().BackfaceCullingOn()
+        # Set the actor's color to the selected metal
+        apply_metal_material(actor, self.colors[self.color_index])
 
         # Reset the camera after changing the model color
         self.renderer.ResetCamera()
-        self.vtk_widget.GetRenderWindow().Render()
+        self.render_scheduler.request_render()
+
+    def prepare_offscreen(self, size):
+        # Mirror the current scene and camera into the offscreen render window
+        if self.offscreen is None:
+            self.offscreen = OffscreenRenderer(*size)
+        self.offscreen.set_size(*size)
+        self.offscreen.sync_scene(self.renderer)
+        return self.offscreen
 
     def record_video(self):
+        import video_capture
+
         self.record_button.setEnabled(False)
-        # Add a timer to control the rotation for video recording
+        self.video_progress_bar.setValue(0)
         self.video_progress_bar.setVisible(True)
-        self.remove_png_files(self.temp_folder)
-        self.rotation_timer = QtCore.QTimer()
-        self.rotation_timer.timeout.connect(self.rotate_for_video)
-        self.rotation_angle = 0  # Initial angle for rotation
-        self.counter = 0
-        self.rotation_timer.start(10)  # Adjust the interval as needed
+
+        # Frames are piped straight into the encoder, nothing is written to disk
+        file_name_without_extension, file_extension = os.path.splitext(
+            os.path.basename(self.file_path)
+        )
+        video_encoder = video_capture.ThreadedVideoEncoder(
+            os.path.join(self.temp_folder, file_name_without_extension + ".mp4")
+        )
+
+        if self.video_recording_checkbox.isChecked():
+            # Follow the camera the user is moving, one frame per timer tick
+            self.video_offscreen = self.prepare_offscreen(self.video_size)
+            self.video_encoder = video_encoder
+            self.rotation_timer = QtCore.QTimer()
+            self.rotation_timer.timeout.connect(self.rotate_for_video)
+            self.rotation_angle = 0  # Initial angle for rotation
+            self.counter = 0
+            self.rotation_timer.start(10)  # Adjust the interval as needed
+        else:
+            # Render the turntable as fast as possible in its own offscreen context
+            # The user keeps measuring and drawing while it records, those
+            # layers are copied so the recorder never reads them mid-change
+            offscreen = OffscreenRenderer(*self.video_size)
+            snapshot_props = set()
+            for layer in self.scene_layers:
+                if layer is not self.scene_layers.model:
+                    snapshot_props.update(layer)
+            offscreen.sync_scene(self.renderer, snapshot_props)
+            camera_path = turntable_camera_path(self.renderer.GetActiveCamera())
+            self.turntable_recorder = TurntableRecorder(
+                offscreen, camera_path, video_encoder, self
+            )
+            self.turntable_recorder.progress_changed.connect(self.video_progress_bar.setValue)
+            self.turntable_recorder.recording_finished.connect(self.on_video_recorded)
+            self.turntable_recorder.recording_failed.connect(self.on_video_failed)
+            self.turntable_recorder.start()
+
+    def on_video_recorded(self, file_name):
+        import video_capture
+
+        self.video_progress_bar.setVisible(False)
+        self.record_button.setEnabled(True)
+        video_capture.open_folder_in_explorer(os.path.dirname(os.path.abspath(file_name)))
+
+    def on_video_failed(self, message):
+        print(f"Error recording video: {message}")
+        self.video_progress_bar.setVisible(False)
+        self.record_button.setEnabled(True)
 
     # --
     def capture_current_view(self):
@@ -444,71 +614,25 @@ class MainWindow(QtWidgets.QMainWindow):
     # --
 
     def rotate_for_video(self):
-        # Rotate the camera for video recording
-        renderer = self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer()
-        camera = renderer.GetActiveCamera()
-        speed = 3
-        if not self.video_recording_checkbox.isChecked():
-            if self.rotation_angle < 359:
-                # Rotate around Y-axis
-                camera.Azimuth(speed)  # Adjust the rotation angle as needed
-
-            else:
-                # Rotate around X-axis
-                camera.OrthogonalizeViewUp()
-                camera.Elevation(speed)
-
-        if self.video_recording_checkbox.isChecked():
-            self.rotation_angle += 2
-        else:
-            self.rotation_angle += speed
+        # Follow the camera the user is moving, the view on screen stays put
+        self.video_offscreen.copy_camera(self.renderer.GetActiveCamera())
+        self.rotation_angle += 2
 
         # Append the frame to the video writer
         self.counter += 1
-        spacer = ""
-        if self.counter < 10:
-            spacer = "00"
-        elif self.counter < 100:
-            spacer = "0"
-
-        image_path = os.path.join(self.temp_folder, f"frame_{spacer}{self.counter}.png")
-        self.save_current_view_as_image(image_path=image_path)
+        self.video_encoder.write_frame(self.video_offscreen.render_image())
         val = int((self.rotation_angle / (359 * 2)) * 100)
         self.video_progress_bar.setValue(val)
 
         # Stop recording after 10 seconds (adjust as needed)
         if self.rotation_angle >= 359 * 2:  # 10 seconds at 30 fps
-            import video_capture
-
             self.rotation_timer.stop()
-            file_name_without_extension, file_extension = os.path.splitext(
-                os.path.basename(self.file_path)
-            )
-
-            video_capture.encode(file_name_without_extension + ".mp4")
-            self.video_progress_bar.setVisible(False)
-            self.record_button.setEnabled(True)
-
-    def remove_png_files(self, folder_path):
-        try:
-            # List all files in the folder
-            files = os.listdir(folder_path)
-
-            # Iterate through the files
-            for file in files:
-                # Check if the file is a .png file
-                if file.endswith(".png"):
-                    # Construct the full file path
-                    file_path = os.path.join(folder_path, file)
-
-                    # Remove the file
-                    os.remove(file_path)
-                    print(f"Removed: {file_path}")
-
-            print("All .png files removed successfully.")
-
-        except Exception as e:
-            print(f"Error: {e}")
+            try:
+                self.video_encoder.close()
+                self.on_video_recorded(self.video_encoder.file_name)
+            except Exception as ex:
+                self.on_video_failed(str(ex))
+            self.video_encoder = None
 
     def setup_interectors(self):
         from annotation_interactor import AnnotationInteractorStyle
@@ -527,6 +651,33 @@ class MainWindow(QtWidgets.QMainWindow):
             measurement_interactor.MeasurementInteractorStyle(self.vtk_widget, self)
         )
 
+        # Every style that moves the camera switches the model to a coarse level
+        # and translucency to the cheap pass
+        for style in (
+            self.default_interactor_style,
+            self.annotation_interactor_style,
+            self.drawing_interactor_style,
+            self.measurement_interactor_style,
+        ):
+            self.lod_controller.watch(style)
+            self.transparency.watch(style)
+
+    def on_quality_transparency_changed(self, state):
+        self.transparency.set_mode("quality" if state == QtCore.Qt.Checked else "fast")
+        self.render_scheduler.request_render()
+
+    def on_id_buffer_picking_changed(self, state):
+        self.picking.set_use_id_buffer(state == QtCore.Qt.Checked)
+
+    def on_target_fps_changed(self, value):
+        self.target_fps = value
+        self.interactor.SetDesiredUpdateRate(value)
+        self.lod_controller.set_target_fps(value)
+
+    def on_tile_memory_changed(self, value):
+        if self.tiled_model is not None:
+            self.tiled_model.set_memory_budget(value * 1024 ** 2)
+
     def update_progress(self, value):
         self.progress_bar.setValue(int(value))
 
@@ -539,101 +690,24 @@ class MainWindow(QtWidgets.QMainWindow):
         if file_path:
             self.save_pdf_with_annotations(file_path)
 
-    def save_current_view_as_image(self, image_path):
-        # Get the render window
-        render_window = self.vtk_widget.GetRenderWindow()
-
-        # Get the current size of the render window
-        width, height = render_window.GetSize()
-
-        # Ensure width and height are divisible by 2
-        if width % 2 != 0:
-            width -= 1
-        if height % 2 != 0:
-            height -= 1
-
-        # Set the adjusted size back to the render window
-        render_window.SetSize(width, height)
-        window_to_image_filter = vtk.vtkWindowToImageFilter()
-        window_to_image_filter.SetInput(self.vtk_widget.GetRenderWindow())
-        window_to_image_filter.Update()
-
-        writer = vtk.vtkPNGWriter()
-        writer.SetFileName(image_path)
-        writer.SetInputData(window_to_image_filter.GetOutput())
-        writer.Write()
-
     def initialize_progress_bar(self):
         self.progress_bar.setRange(0, 100)
 
-    def rotate_camera(self):
-        renderer = self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer()
-        camera = renderer.GetActiveCamera()
-        camera.Azimuth(90)
-        self.vtk_widget.GetRenderWindow().Render()
-
     def save_pdf_with_annotations(self, file_path):
-        from custom_pdf import CustomPDF
+        from custom_pdf import views_layout, write_views_pdf
 
         try:
-            pdf = CustomPDF(orientation="L", unit="mm", format="A4")
-            pdf.set_auto_page_break(auto=True, margin=15)
-
-            renderer = (
-                self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer()
+            # Render every view at the aspect of its cell on the page
+            _, cell_width, cell_height = views_layout(len(self.pdf_views))
+            image_height = int(self.pdf_image_width * cell_height / cell_width) // 2 * 2
+            offscreen = self.prepare_offscreen((self.pdf_image_width, image_height))
+
+            # Update the progress bar as the views come in
+            images = offscreen.render_views(
+                self.pdf_views,
+                progress=lambda done, total: self.update_progress(done * 100 / total),
             )
-
-            pdf.add_page()
-
-            # Define the dimensions and positions for each image in the 2x2 layout
-            image_width = 297 / 2  # Half the width of the page
-            image_height = 210 / 2  # Half the height of the page
-            image_positions = [
-                (0, 0),  # Top-left position (bottom view)
-                (image_width, 0),  # Top-right position (top view)
-                (0, image_height),  # Bottom-left position (right view)
-                (image_width, image_height),  # Bottom-right position (left view)
-            ]
-
-            image_index = 0
-            total_images = 4
-            for image_index in range(total_images):
-                # Save the current view as an image
-                image_path = f"temp_image_{image_index}.png"
-                if image_index == 0:  # Bottom view
-                    self.rotate_camera()  # Rotate the camera for bottom view
-                elif image_index == 1:  # Top view
-                    self.rotate_camera()  # Rotate the camera again for top view
-                elif image_index == 2:  # Right view
-                    self.rotate_camera()  # Rotate the camera again for right view
-                elif image_index == 3:  # Left view
-                    self.rotate_camera()  # Rotate the camera again for left view
-
-                self.save_current_view_as_image(image_path)
-
-                # Add the image to the PDF at the corresponding position
-                x, y = image_positions[image_index]
-
-                # Load the saved image
-                image = QPixmap(image_path)
-                image_width_px = image.width()
-                image_height_px = image.height()
-
-                # Calculate the scaling factors
-                scale_width = image_width / image_width_px
-                scale_height = image_height / image_height_px
-
-                # Calculate the scaled dimensions
-                scaled_width = image_width_px * scale_width
-                scaled_height = image_height_px * scale_height
-
-                # Add the scaled image to the PDF
-                pdf.image(image_path, x=x, y=y, w=scaled_width, h=scaled_height)
-
-                # Update the progress bar
-                progress_value = (image_index + 1) * 100 / total_images
-                self.update_progress(progress_value)
-            pdf.output(file_path)
+            write_views_pdf(file_path, images)
         except Exception as ex:
             print(ex)
 
@@ -644,95 +718,300 @@ class MainWindow(QtWidgets.QMainWindow):
             self.interactor.SetInteractorStyle(self.annotation_interactor_style)
         else:
             self.annotation_text_edit.setEnabled(False)
-            self.interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+            self.interactor.SetInteractorStyle(self.default_interactor_style)
 
     def open_file(self):
         file_dialog = QFileDialog()
-        self.file_path, _ = file_dialog.getOpenFileName(
+        file_path, _ = file_dialog.getOpenFileName(
             self, "Open STL File", "", "STL Files (*.stl)"
         )
 
-        if self.file_path:
-            if True:
-                w = get_weight_text(self.file_path)
-                text = ""
-                for key, value in w.items():
-                    text += key + ": {:.2f}".format(value) + "\n"
+        if file_path:
+            self.file_path = file_path
+            self.cancel_loading()
+            if os.path.getsize(file_path) >= self.out_of_core_size:
+                self.open_tiled_file()
+                return
 
-                self.text_actor.SetInput(text)
-            self.load_stl_file(self.file_path)
-            self.set_gold_material()
+            # Parse the file, weld it and compute the weight in the background
+            self.load_worker = MeshLoadWorker(
+                self.file_path,
+                self.mesh_cache,
+                self.metals,
+                auto_repair=self.auto_repair_checkbox.isChecked(),
+                parent=self,
+            )
+            self.load_worker.progress_changed.connect(self.on_load_progress)
+            self.load_worker.preview_ready.connect(self.on_preview_ready)
+            self.load_worker.mesh_ready.connect(self.on_mesh_ready)
+            self.load_worker.load_failed.connect(self.on_load_failed)
+            self.load_worker.load_cancelled.connect(self.on_load_cancelled)
+
+            self.initialize_progress_bar()
+            self.update_progress(0)
+            self.cancel_load_button.setVisible(True)
+            self.load_worker.start()
+
+    def open_tiled_file(self):
+        # Split the file into tiles once, or find the tiles of an earlier run
+        self.load_worker = TileSetWorker(self.file_path, self)
+        self.load_worker.progress_changed.connect(self.on_load_progress)
+        self.load_worker.tileset_ready.connect(self.on_tileset_ready)
+        self.load_worker.load_failed.connect(self.on_load_failed)
+        self.load_worker.load_cancelled.connect(self.on_load_cancelled)
+
+        self.initialize_progress_bar()
+        self.update_progress(0)
+        self.cancel_load_button.setVisible(True)
+        self.load_worker.start()
+
+    def on_tileset_ready(self, tileset):
+        if not self._is_current_load():
+            return
 
-    def _handle_size_annotations(self):
-        self.rectangle_actor, self.size_annotation_text = draw_bound_rect(
-            self.reader, self.renderer
+        # Only the tiles the camera needs are read, the whole mesh never is,
+        # so the tools that work on the full mesh are left out
+        self.mesh = None
+        self.cancel_lod_builder()
+        self.cancel_oriented_box_builder()
+        self.cancel_normals_builder()
+        self.cancel_validator()
+        self.lod_controller.clear()
+        self.picking.clear()
+        self.scene_layers.clear()
+        self._image_actor = None
+        self.clear_tiled_model()
+        self.tiled_model = TiledModel(
+            self.renderer,
+            tileset,
+            self.scene_layers.model,
+            self.render_scheduler.request_render,
+            memory_budget=self.tile_memory_spin_box.value() * 1024 ** 2,
+            parent=self,
         )
-        self.renderer.AddActor(self.rectangle_actor)
-        self.add_annoation_actor()
+        self.tiled_model.update()
+
+        # Weight and size come from the pass that split the file
+        weights = get_weight_table(tileset.mass_properties.volume, self.metals)
+        self.weight_text = format_weight_text(weights, tileset.mass_properties)
+        self.text_actor.SetInput(self.weight_text)
+        self.size_overlay.set_bounds(tileset.bounds)
+        for actor in self.size_overlay.actors():
+            self.scene_layers.size_annotations.add(actor)
         self.draw_rect_checkbox.setChecked(True)
+        self.transparency.reset()
+        self.set_gold_material()
+        self._finish_loading()
+
+    def clear_tiled_model(self):
+        if self.tiled_model is not None:
+            self.tiled_model.clear()
+            self.tiled_model = None
+
+    def cancel_loading(self):
+        if self.load_worker is not None and self.load_worker.isRunning():
+            self.load_worker.cancel()
+
+    def _is_current_load(self):
+        # Ignore signals still queued from a load that has been replaced
+        return self.sender() is self.load_worker
 
-    def load_stl_file(self, file_path):
-        # Remove existing actors from the renderer
-        self.renderer.RemoveAllViewProps()
+    def _finish_loading(self):
+        self.cancel_load_button.setVisible(False)
+        self.load_worker = None
 
-        # Create a reader and load the STL file
-        self.reader = vtk.vtkSTLReader()
-        self.reader.SetFileName(file_path)
-        self.reader.Update()
+    def on_load_progress(self, value):
+        if self._is_current_load():
+            self.update_progress(value)
 
-        # Get the STL mesh
-        stl_mesh = self.reader.GetOutput()
+    def on_preview_ready(self, polydata):
+        if not self._is_current_load():
+            return
+
+        # Show the decimated preview until the full resolution mesh is ready
+        self.mesh = None
+        self.cancel_lod_builder()
+        self.cancel_normals_builder()
+        self.cancel_validator()
+        self.cancel_oriented_box_builder()
+        self.lod_controller.clear()
+        self.picking.clear()
+        self._show_model(polydata)
+        self.set_gold_material()
+
+    def on_mesh_ready(self, mesh_data, weights):
+        if not self._is_current_load():
+            return
+
+        self.weight_text = format_weight_text(weights, mesh_data.mass_properties)
+        self.text_actor.SetInput(self.weight_text)
+        self.load_stl_file(self.file_path, mesh_data=mesh_data)
+        self.set_gold_material()
+        self._finish_loading()
+
+        # Check the mesh in the background, the results join the weight text
+        self.cancel_validator()
+        self.validator = MeshValidator(mesh_data, self)
+        self.validator.report_ready.connect(self.on_validation_ready)
+        self.validator.start()
+
+    def cancel_validator(self):
+        if self.validator is not None and self.validator.isRunning():
+            self.validator.requestInterruption()
+
+    def on_validation_ready(self, report):
+        # Ignore the report of a model that has been replaced in the meantime
+        if self.sender() is not self.validator or self.mesh is None:
+            return
+        self.mesh.validation = report
+        self.text_actor.SetInput(self.weight_text + format_validation_text(report, self.mesh.repair_changes))
+        self.render_scheduler.request_render()
+
+    def on_load_failed(self, message):
+        if self._is_current_load():
+            print(f"Error loading {self.file_path}: {message}")
+            self._abort_loading()
+
+    def on_load_cancelled(self):
+        if self._is_current_load():
+            self._abort_loading()
+
+    def _abort_loading(self):
+        # Drop the preview of the model that was not loaded
+        if self.mesh is None and self._image_actor is not None:
+            self.scene_layers.model.remove(self._image_actor)
+            self._image_actor = None
+        self.lod_controller.clear()
+        self.picking.clear()
+        self.update_progress(0)
+        self._finish_loading()
+        self.render_scheduler.request_render()
+
+    def _handle_size_annotations(self):
+        # The same box and labels move to the new model
+        self.update_size_overlay()
+        for actor in self.size_overlay.actors():
+            self.scene_layers.size_annotations.add(actor)
+        self.draw_rect_checkbox.setChecked(True)
+
+    def _show_model(self, polydata):
+        # Remove the actors of the previous model, the overlays stay
+        self.scene_layers.clear()
+        self.clear_tiled_model()
 
         # Create a mapper
         mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(stl_mesh)
+        mapper.SetInputData(polydata)
 
         # Create an actor
         self._image_actor = vtk.vtkActor()
         self._image_actor.SetMapper(mapper)
 
-        # Add the actor to the renderer
-        self.renderer.AddActor(self._image_actor)
-        self.renderer.AddActor(self.text_actor)
-        self.renderer.AddActor(self.watermark_actor)
-        self.renderer.AddActor(self.logo_actor)
+        # Add the actor to the renderer, it picks up the current opacity and representation
+        self.scene_layers.model.add(self._image_actor)
+        self.renderer.ResetCamera()
+
+    def load_stl_file(self, file_path, mesh_data=None):
+        # Load the STL file unless it has already been parsed
+        if mesh_data is None:
+            mesh_data = load_mesh(file_path)
+        self.mesh = mesh_data
+
+        self._show_model(self.mesh.polydata)
         self._handle_size_annotations()
         self.renderer.ResetCamera()
 
-        self.vtk_widget.GetRenderWindow().Render()
+        # Decimate the coarse versions in the background, unless they are cached
+        self.lod_controller.set_model(self._image_actor, self.mesh.lod_levels)
+        self.transparency.reset()
+        self.cancel_lod_builder()
+        self.cancel_normals_builder()
+        self.update_shading()
+        if not self.mesh.lod_levels:
+            self.lod_builder = LodBuilder(self.mesh.polydata, self)
+            self.lod_builder.level_ready.connect(self.on_lod_level_ready)
+            self.lod_builder.all_levels_ready.connect(self.on_all_lod_levels_ready)
+            self.lod_builder.start()
+
+        self.render_scheduler.request_render()
+
+    def on_smooth_shading_changed(self, state):
+        if self.mesh is None:
+            return
+        self.update_shading()
+        self.render_scheduler.request_render()
+
+    def update_shading(self):
+        # The flat mesh is shown until the smooth normals are ready
+        if not self.smooth_shading_checkbox.isChecked():
+            self.lod_controller.set_full_polydata(self.mesh.polydata)
+        elif self.mesh.smooth_polydata is not None:
+            self.lod_controller.set_full_polydata(self.mesh.smooth_polydata)
+        elif self.normals_builder is None or self.normals_builder.polydata is not self.mesh.polydata:
+            self.cancel_normals_builder()
+            self.normals_builder = NormalsBuilder(self.mesh.polydata, self)
+            self.normals_builder.normals_ready.connect(self.on_normals_ready)
+            self.normals_builder.start()
+        self.update_picking()
+
+    def update_picking(self):
+        # Index whichever full resolution mesh the mapper shows
+        polydata = self.lod_controller.full_polydata
+        builder = self.picking.locator_builder
+        if self.picking.actor is not self._image_actor or builder is None or builder.polydata is not polydata:
+            self.picking.set_model(self._image_actor, polydata)
+
+    def cancel_normals_builder(self):
+        if self.normals_builder is not None and self.normals_builder.isRunning():
+            self.normals_builder.cancel()
+
+    def on_normals_ready(self, smooth_polydata):
+        # Ignore the normals of a model that has been replaced in the meantime
+        if self.sender() is not self.normals_builder or self.mesh is None:
+            return
+        self.mesh.smooth_polydata = smooth_polydata
+        # The cache holds the mesh as it is in the file, not a repaired one
+        if self.mesh.repair_changes is None:
+            self.mesh_cache.store_smooth_normals(self.file_path, smooth_polydata)
+        self.update_shading()
+        self.render_scheduler.request_render()
+
+    def cancel_lod_builder(self):
+        if self.lod_builder is not None and self.lod_builder.isRunning():
+            self.lod_builder.cancel()
+
+    def on_lod_level_ready(self, level):
+        # Ignore levels of a model that has been replaced in the meantime
+        if self.sender() is self.lod_builder:
+            self.lod_controller.add_level(level)
+
+    def on_all_lod_levels_ready(self, levels):
+        if self.sender() is self.lod_builder and levels and self.mesh is not None:
+            self.mesh.lod_levels = levels
+            if self.mesh.repair_changes is None:
+                self.mesh_cache.store_lod_levels(self.file_path, levels)
 
     def on_slider_value_changed(self, value):
-        # Restart the update timer
-        self.update_timer.start()
+        # Only the model is see-through, applied while the slider moves
+        self.scene_layers.model.set_opacity(value / 100.0)
+        self.transparency.set_opacity(value / 100.0)
+        self.render_scheduler.request_render()
 
     def on_switch_button_clicked(self):
-        # Restart the update timer
-        self.update_timer.start()
         if self.switch_button.isChecked():
             self._handle_buttons_states(wireframe=True)
+        self.update_model()
 
     def update_model(self):
-        # This function is called after adjusting the camera position
-        opacity = self.slider.value() / 100.0
-        is_wireframe = self.switch_button.isChecked()
-        actors = self.renderer.GetActors()
-        actors.InitTraversal()
-        actor = actors.GetNextItem()
-        while actor:
-            actor.GetProperty().SetOpacity(opacity)
-            if is_wireframe:
-                actor.GetProperty().SetRepresentationToWireframe()
-            else:
-                actor.GetProperty().SetRepresentationToSurface()
-            actor = actors.GetNextItem()
-        self.vtk_widget.GetRenderWindow().Render()
+        self.scene_layers.model.set_wireframe(self.switch_button.isChecked())
+        self.render_scheduler.request_render()
 
     def on_measurement_button_clicked(self):
         if self.measurement_button.isChecked():
             self._handle_buttons_states(measurement=True)
             self.interactor.SetInteractorStyle(self.measurement_interactor_style)
         else:
-            self.interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+            self.interactor.SetInteractorStyle(self.default_interactor_style)
 
     def _handle_buttons_states(
         self, drawing=False, measurement=False, wireframe=False, annotate=False
@@ -742,7 +1021,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.switch_button.setChecked(wireframe)
         self.annotation_button.setChecked(annotate)
         if not drawing and not measurement and not wireframe and not annotate:
-            self.interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+            self.interactor.SetInteractorStyle(self.default_interactor_style)
 
     def on_drawing_button_clicked(self):
         if self.drawing_button.isChecked():
@@ -750,4 +1029,4 @@ class MainWindow(QtWidgets.QMainWindow):
             self.interactor.SetInteractorStyle(self.drawing_interactor_style)
 
         else:
-            self.interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+            self.interactor.SetInteractorStyle(self.default_interactor_style)
@@ -0,0 +1,184 @@
+import numpy as np
+
+# Triangles per chunk, about 200 MB of float64 temporaries at most
+CHUNK_SIZE = 1000000
+# Triangles per chunk when streaming a file, a 5 MB read buffer
+STREAM_CHUNK_SIZE = 100000
+
+
+class MassProperties:
+    def __init__(self, volume, area, centroid, inertia, boundary_edges=None, non_manifold_edges=None, bounds=None):
+        # mm³ and mm², signed volume is negative for inside-out meshes
+        self.volume = volume
+        self.area = area
+        # Center of mass and inertia tensor about it, for unit density (mm⁵)
+        self.centroid = centroid
+        self.inertia = inertia
+        # Edges used by one triangle or by more than two, None if not checked
+        self.boundary_edges = boundary_edges
+        self.non_manifold_edges = non_manifold_edges
+        # (xmin, xmax, ymin, ymax, zmin, zmax) like vtkPolyData.GetBounds
+        self.bounds = bounds
+
+    @property
+    def watertight(self):
+        # Volume, and so weight, is only exact for closed manifold surfaces
+        if self.boundary_edges is None:
+            return None
+        return self.boundary_edges == 0 and self.non_manifold_edges == 0 and self.volume > 0
+
+    def to_dict(self):
+        return {
+            "volume": self.volume,
+            "area": self.area,
+            "centroid": list(self.centroid),
+            "inertia": np.asarray(self.inertia).tolist(),
+            "boundary_edges": self.boundary_edges,
+            "non_manifold_edges": self.non_manifold_edges,
+            "bounds": None if self.bounds is None else list(self.bounds),
+        }
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(
+            values["volume"],
+            values["area"],
+            tuple(values["centroid"]),
+            np.array(values["inertia"]),
+            values.get("boundary_edges"),
+            values.get("non_manifold_edges"),
+            None if values.get("bounds") is None else tuple(values["bounds"]),
+        )
+
+
+def iter_mesh_chunks(points, faces, chunk_size=CHUNK_SIZE):
+    for start in range(0, len(faces), chunk_size):
+        yield points[faces[start:start + chunk_size]]
+
+
+def chunk_sums(chunk, origin):
+    # Partial sums of one (n, 3, 3) chunk, taken relative to origin so large
+    # coordinates do not eat the precision
+    triangles = np.asarray(chunk, dtype=np.float64)
+    corners = triangles.reshape(-1, 3)
+    lower = corners.min(axis=0)
+    upper = corners.max(axis=0)
+    triangles = triangles - origin
+    v0, v1, v2 = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+
+    # Six times the signed volume of each tetrahedron (origin, v0, v1, v2)
+    det = np.einsum("ij,ij->i", v0, np.cross(v1, v2))
+    area2 = np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1).sum()
+
+    # Tetrahedron moments: ∫x dV = det/24 Σv, ∫xxᵀ dV = det/120 (Σvvᵀ + ΣvΣvᵀ)
+    vertex_sum = v0 + v1 + v2
+    first_moment = det @ vertex_sum / 24.0
+    outer = (
+        np.einsum("i,ij,ik->jk", det, v0, v0)
+        + np.einsum("i,ij,ik->jk", det, v1, v1)
+        + np.einsum("i,ij,ik->jk", det, v2, v2)
+        + np.einsum("i,ij,ik->jk", det, vertex_sum, vertex_sum)
+    )
+    return det.sum(), area2, first_moment, outer / 120.0, lower, upper
+
+
+def reduce_sums(partial_sums, origin):
+    # Folds the chunk sums in the order given, the same chunks in the same
+    # order give bit-identical results however they were computed
+    volume6 = 0.0
+    area2 = 0.0
+    first_moment = np.zeros(3)
+    second_moment = np.zeros((3, 3))
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    for sums in partial_sums:
+        volume6 += sums[0]
+        area2 += sums[1]
+        first_moment += sums[2]
+        second_moment += sums[3]
+        lower = np.minimum(lower, sums[4])
+        upper = np.maximum(upper, sums[5])
+
+    volume = volume6 / 6.0
+    if origin is None:
+        return MassProperties(volume, area2 / 2.0, (0.0, 0.0, 0.0), np.zeros((3, 3)))
+    bounds = tuple(float(value) for pair in zip(lower, upper) for value in pair)
+    if volume == 0.0:
+        return MassProperties(volume, area2 / 2.0, (0.0, 0.0, 0.0), np.zeros((3, 3)), bounds=bounds)
+
+    center = first_moment / volume
+    # Move the second moment to the center of mass and turn it into inertia
+    covariance = second_moment - volume * np.outer(center, center)
+    inertia = np.trace(covariance) * np.eye(3) - covariance
+    centroid = tuple(float(c) for c in center + origin)
+    return MassProperties(float(volume), float(area2 / 2.0), centroid, inertia, bounds=bounds)
+
+
+def accumulate(triangle_chunks):
+    # One pass over (n, 3, 3) chunks, relative to the first vertex
+    origin = None
+    partial_sums = []
+    for chunk in triangle_chunks:
+        if len(chunk) == 0:
+            continue
+        if origin is None:
+            origin = np.array(chunk[0, 0], dtype=np.float64)
+        partial_sums.append(chunk_sums(chunk, origin))
+    return reduce_sums(partial_sums, origin)
+
+
+def _shard_sums(file_path, start, stop, origin):
+    import stl_reader
+
+    # Runs in a worker process, each one maps the file on its own
+    records = stl_reader.map_binary_stl(file_path)
+    return chunk_sums(records["vertices"][start:stop], origin)
+
+
+def parallel_file_mass_properties(file_path, workers=None, chunk_size=STREAM_CHUNK_SIZE):
+    import stl_reader
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Shards are the same chunks a serial pass walks, map keeps their order,
+    # so the reduction does not depend on the number of workers
+    records = stl_reader.map_binary_stl(file_path)
+    if len(records) == 0:
+        return reduce_sums([], None)
+    origin = np.array(records["vertices"][0, 0], dtype=np.float64)
+    starts = list(range(0, len(records), chunk_size))
+    stops = [min(start + chunk_size, len(records)) for start in starts]
+    del records
+
+    count = len(starts)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partial_sums = executor.map(
+            _shard_sums, [file_path] * count, starts, stops, [origin] * count,
+            chunksize=max(1, count // (4 * (workers or 1))),
+        )
+        return reduce_sums(partial_sums, origin)
+
+
+def count_bad_edges(faces, point_count):
+    # An edge of a closed manifold surface belongs to exactly two triangles
+    edges = np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]))
+    edges.sort(axis=1)
+    keys = edges[:, 0].astype(np.int64) * int(point_count) + edges[:, 1]
+    _, counts = np.unique(keys, return_counts=True)
+    return int(np.count_nonzero(counts == 1)), int(np.count_nonzero(counts > 2))
+
+
+def compute_mass_properties(points, faces, chunk_size=CHUNK_SIZE, check_edges=True):
+    properties = accumulate(iter_mesh_chunks(points, faces, chunk_size))
+    if check_edges:
+        properties.boundary_edges, properties.non_manifold_edges = count_bad_edges(faces, len(points))
+    return properties
+
+
+def stream_mass_properties(file_path, chunk_size=STREAM_CHUNK_SIZE, workers=1):
+    import stl_reader
+
+    # Binary files can be split across processes, ASCII ones are parsed in order
+    if workers != 1 and stl_reader.is_binary_stl(file_path):
+        return parallel_file_mass_properties(file_path, workers, chunk_size)
+    # Binary or ASCII, memory stays at one chunk whatever the file size
+    return accumulate(stl_reader.iter_triangles(file_path, chunk_size))
@@ -0,0 +1,51 @@
+import json
+import os
+
+# Optional table next to the application, a JSON list of
+# {"name": ..., "density": g/cm³, "color": [r, g, b]} replacing the defaults
+METALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metals.json")
+
+# Metals and alloys offered for the weight table and the model color
+DEFAULT_METALS = [
+    {"name": "9K", "density": 11.0, "color": (0.81, 0.71, 0.23)},
+    {"name": "14K", "density": 13.0, "color": (0.98, 0.84, 0.65)},
+    {"name": "18K", "density": 15.6, "color": (0.91, 0.76, 0.29)},
+    {"name": "21K", "density": 17.0, "color": (0.95, 0.78, 0.25)},
+    {"name": "22K", "density": 17.5, "color": (0.96, 0.80, 0.22)},
+    {"name": "Rose Gold", "density": 15.0, "color": (0.86, 0.58, 0.58)},
+    {"name": "Silver", "density": 10.36, "color": (0.75, 0.75, 0.75)},
+    {"name": "Platinum", "density": 20.7, "color": (0.68, 0.68, 0.68)},
+]
+
+# The viewer and the reports start with 18K gold
+DEFAULT_METAL = "18K"
+
+
+def load_metals(file_path=METALS_FILE):
+    if not os.path.exists(file_path):
+        return [dict(metal) for metal in DEFAULT_METALS]
+    with open(file_path, "r", encoding="utf-8") as f:
+        metals = json.load(f)
+    for metal in metals:
+        metal["density"] = float(metal["density"])
+        metal["color"] = tuple(metal["color"])
+    return metals
+
+
+def metal_color(metals, name):
+    for metal in metals:
+        if metal["name"] == name:
+            return metal["color"]
+    return metals[0]["color"]
+
+
+def apply_metal_material(actor, color):
+    # Shiny metal look used for the model in the viewer and in reports
+    actor.GetProperty().SetColor(color)
+    actor.GetProperty().SetSpecular(1.0)
+    actor.GetProperty().SetSpecularPower(50)
+    actor.GetProperty().SetAmbient(0.2)
+    actor.GetProperty().SetDiffuse(0.8)
+
+    # Enable backface culling
+    actor.GetProperty().BackfaceCullingOn()
@@ -1,8 +1,143 @@
+
 import vtk
-from collections import defaultdict
 import math
-import random
-import time
+
+
+class MeasurementSet:
+    # All measurements share three actors: instanced sphere glyphs for the
+    # end points, one line polydata for the segments and one label mapper
+    def __init__(self, scaling_factor=1.0):
+        self.scaling_factor = scaling_factor
+        # Measurement id -> slot, slot i owns points 2i and 2i + 1, line i and label i
+        self.slots = {}
+        self.slot_ids = []
+        self.next_id = 0
+
+        self.points = vtk.vtkPoints()
+        self.lines = vtk.vtkCellArray()
+        self.polydata = vtk.vtkPolyData()
+        self.polydata.SetPoints(self.points)
+        self.polydata.SetLines(self.lines)
+
+        self.label_points = vtk.vtkPoints()
+        self.labels = vtk.vtkStringArray()
+        self.labels.SetName("Labels")
+        self.label_polydata = vtk.vtkPolyData()
+        self.label_polydata.SetPoints(self.label_points)
+        self.label_polydata.GetPointData().AddArray(self.labels)
+
+        sphere = vtk.vtkSphereSource()
+        sphere.SetRadius(0.080)  # Adjust the radius as needed
+        marker_mapper = vtk.vtkGlyph3DMapper()
+        marker_mapper.SetInputData(self.polydata)
+        marker_mapper.SetSourceConnection(sphere.GetOutputPort())
+        marker_mapper.ScalingOff()
+        self.marker_actor = vtk.vtkActor()
+        self.marker_actor.SetMapper(marker_mapper)
+        self.marker_actor.GetProperty().SetColor(0.0, 1.0, 0.0)  # Green color
+
+        line_mapper = vtk.vtkPolyDataMapper()
+        line_mapper.SetInputData(self.polydata)
+        self.line_actor = vtk.vtkActor()
+        self.line_actor.SetMapper(line_mapper)
+        self.line_actor.GetProperty().SetColor(1.0, 0.0, 0.0)  # Red color
+        self.line_actor.GetProperty().SetLineWidth(2)
+
+        label_mapper = vtk.vtkLabeledDataMapper()
+        label_mapper.SetInputData(self.label_polydata)
+        label_mapper.SetLabelModeToLabelFieldData()
+        label_mapper.SetFieldDataName("Labels")
+        label_mapper.GetLabelTextProperty().SetColor(1.0, 0.0, 0.0)
+        label_mapper.GetLabelTextProperty().SetFontSize(16)
+        label_mapper.GetLabelTextProperty().ShadowOff()
+        self.label_actor = vtk.vtkActor2D()
+        self.label_actor.SetMapper(label_mapper)
+
+    def actors(self):
+        return self.marker_actor, self.line_actor, self.label_actor
+
+    def __len__(self):
+        return len(self.slot_ids)
+
+    def __iter__(self):
+        # Yields (measurement id, start, end, distance in mm)
+        for slot, measurement_id in enumerate(self.slot_ids):
+            start = self.points.GetPoint(2 * slot)
+            end = self.points.GetPoint(2 * slot + 1)
+            yield measurement_id, start, end, self.distance(start, end)
+
+    def distance(self, start_position, end_position):
+        return math.dist(start_position, end_position) * self.scaling_factor
+
+    def add(self, start_position, end_position):
+        measurement_id = self.next_id
+        self.next_id += 1
+        slot = len(self.slot_ids)
+        self.slots[measurement_id] = slot
+        self.slot_ids.append(measurement_id)
+
+        first = self.points.InsertNextPoint(start_position)
+        self.points.InsertNextPoint(end_position)
+        self.lines.InsertNextCell(2)
+        self.lines.InsertCellPoint(first)
+        self.lines.InsertCellPoint(first + 1)
+        self.label_points.InsertNextPoint(0.0, 0.0, 0.0)
+        self.labels.InsertNextValue("")
+        self._update_label(slot)
+        self._modified()
+        return measurement_id
+
+    def last(self):
+        return self.slot_ids[-1] if self.slot_ids else None
+
+    def set_end(self, measurement_id, end_position):
+        slot = self.slots[measurement_id]
+        self.points.SetPoint(2 * slot + 1, end_position)
+        self._update_label(slot)
+        self._modified()
+
+    def remove(self, measurement_id):
+        # Move the last measurement into the freed slot, nothing else shifts
+        slot = self.slots.pop(measurement_id)
+        last_slot = len(self.slot_ids) - 1
+        if slot != last_slot:
+            moved_id = self.slot_ids[last_slot]
+            self.slot_ids[slot] = moved_id
+            self.slots[moved_id] = slot
+            self.points.SetPoint(2 * slot, self.points.GetPoint(2 * last_slot))
+            self.points.SetPoint(2 * slot + 1, self.points.GetPoint(2 * last_slot + 1))
+            self.label_points.SetPoint(slot, self.label_points.GetPoint(last_slot))
+            self.labels.SetValue(slot, self.labels.GetValue(last_slot))
+        self.slot_ids.pop()
+
+        # Line i always joins points 2i and 2i + 1, dropping the last one is enough
+        self.points.SetNumberOfPoints(2 * last_slot)
+        self.lines.GetOffsetsArray().SetNumberOfValues(last_slot + 1)
+        self.lines.GetConnectivityArray().SetNumberOfValues(2 * last_slot)
+        self.label_points.SetNumberOfPoints(last_slot)
+        self.labels.SetNumberOfValues(last_slot)
+        self._modified()
+
+    def clear(self):
+        self.slots.clear()
+        self.slot_ids.clear()
+        self.points.Reset()
+        self.lines.Reset()
+        self.label_points.Reset()
+        self.labels.Reset()
+        self._modified()
+
+    def _update_label(self, slot):
+        start = self.points.GetPoint(2 * slot)
+        end = self.points.GetPoint(2 * slot + 1)
+        midpoint = [(s + e) / 2 for s, e in zip(start, end)]
+        self.label_points.SetPoint(slot, midpoint)
+        self.labels.SetValue(slot, f"{self.distance(start, end):.2f} mm")
+
+    def _modified(self):
+        for data in (self.points, self.lines, self.polydata, self.label_points, self.labels, self.label_polydata):
+            data.Modified()
+
 
 class MeasurementInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
     def __init__(self, vtk_widget, window):
@@ -11,120 +146,9 @@ class MeasurementInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         # Register observer for the MouseMoveEvent
         self.AddObserver("MouseMoveEvent", self.on_mouse_move)
         self.vtk_widget = vtk_widget
-        self.measurement_text = ""        
-        self.measurement_start_position = None
-        self.measurement_active = False
-        self.scaling_factor = 1.0  # Set the scaling factor here
-        self.line_actor = None  # Line actor to store the line between start and end points
-
-        self.dynamic_line_actor = None  # Line actor for the dynamic line
-        self.dynamic_line_source = None  # Line source for the dynamic line
-        self.dynamic_line_color = (1.0, 0.0, 0.0)  # Color of the dynamic line (e.g., red)
-        self.last_update = time.time()
-        self.measurement_actor = None
-
-
-    def _left_button_press_event(self, obj, event):
-        if not self.window.measurement_button.isChecked():
-            super().OnLeftButtonDown()
-            return
-
-        interactor = self.GetInteractor()
-        mouse_position = interactor.GetEventPosition()
-
-        picker = vtk.vtkCellPicker()
-        picker.SetTolerance(0.001)
-        picker.Pick(
-            mouse_position[0],
-            mouse_position[1],
-            0,
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer(),
-        )
-
-        if picker.GetCellId() >= 0:
-            picked_position = picker.GetPickPosition()
-            self.handle_measurement(picked_position)
-
-        self.vtk_widget.GetRenderWindow().Render()
-
-    def draw_line(self, start_position, end_position):
-        # Create a line between the start and end position
-        line_source = vtk.vtkLineSource()
-        line_source.SetPoint1(start_position)
-        line_source.SetPoint2(end_position)
-        line_source.Update()
-
-        # Create a mapper and actor for the line
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(line_source.GetOutput())
-
-        self.line_actor = vtk.vtkActor()
-        self.line_actor.SetMapper(mapper)
-        self.line_actor.GetProperty().SetColor(1.0, 0.0, 0.0)  # Red color
-        self.line_actor.GetProperty().SetLineWidth(2)  # Adjust line width as needed
-
-        # Add the line actor to the renderer
-        self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().AddActor(self.line_actor)
-        self.vtk_widget.GetRenderWindow().Render()
-
-
-    def calculate_distance(self, start_position, end_position):
-        # Calculate the distance between two points in millimeters
-        squared_distance = vtk.vtkMath.Distance2BetweenPoints(
-            start_position, end_position
-        )
-        distance_mm = math.sqrt(squared_distance) * self.scaling_factor  # Adjust scaling_factor
-        return round(distance_mm, 2)
-
-
-    def add_measurement_text(self, position, distance_mm, c=(1.0, 0.0, 0)):
-        measurement_text = f"{distance_mm:.2f} mm"        
-        self.measurement_actor.SetInput(measurement_text)
-        self.measurement_actor.SetPosition(position[0], position[1], position[2] + 1.0)
-        self.measurement_actor.GetTextProperty().SetColor(c)  # Green color
-        self.measurement_actor.GetTextProperty().SetFontSize(16)  # Adjust font size as needed
-        self.measurement_actor.SetVisibility(True)
-
- 
-
-    def random_color(self):
-        # Generate random RGB values
-        r = random.uniform(0.0, 1.0)
-        g = random.uniform(0.0, 1.0)
-        b = random.uniform(0.0, 1.0)
-        return (r, g, b)
-
-    def _add_saphere(self, start_position, end_position):
-        # Create spheres at the start and end positions
-        sphere_radius = .080  # Adjust the radius as needed
-        start_sphere = vtk.vtkSphereSource()
-        start_sphere.SetRadius(sphere_radius)
-        start_sphere.SetCenter(start_position)
-
-        end_sphere = vtk.vtkSphereSource()
-        end_sphere.SetRadius(sphere_radius)
-        end_sphere.SetCenter(end_position)
-
-        # Create mappers and actors for the spheres
-        start_sphere_mapper = vtk.vtkPolyDataMapper()
-        start_sphere_mapper.SetInputConnection(start_sphere.GetOutputPort())
-        start_sphere_actor = vtk.vtkActor()
-        start_sphere_actor.SetMapper(start_sphere_mapper)
-
-        end_sphere_mapper = vtk.vtkPolyDataMapper()
-        end_sphere_mapper.SetInputConnection(end_sphere.GetOutputPort())
-        end_sphere_actor = vtk.vtkActor()
-        end_sphere_actor.SetMapper(end_sphere_mapper)
-
-        # Set colors for the spheres (you can customize these)
-        start_sphere_actor.GetProperty().SetColor(0.0, 1.0, 0.0)  # Green color
-        end_sphere_actor.GetProperty().SetColor(0.0, 1.0, 0.0)  # Green color
-
-        # Add the line and sphere actors to the renderer
-        renderer = self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer()
-
-        renderer.AddActor(start_sphere_actor)
-        renderer.AddActor(end_sphere_actor)
+        self.measurements = MeasurementSet(scaling_factor=1.0)  # Set the scaling factor here
+        # Measurement whose end follows the mouse until the second click
+        self.active_measurement = None
 
     def left_button_press_event(self, obj, event):
         if not self.window.measurement_button.isChecked():
@@ -134,91 +158,44 @@ class MeasurementInteractorStyle(vtk.vtkInteractorStyleTrackballCamera):
         interactor = self.GetInteractor()
         mouse_position = interactor.GetEventPosition()
 
-        picker = vtk.vtkCellPicker()
-        picker.SetTolerance(0.001)
-        picker.Pick(
-            mouse_position[0],
-            mouse_position[1],
-            0,
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer(),
-        )
-
-        if picker.GetCellId() >= 0:
-            picked_position = picker.GetPickPosition()
+        picked_position = self.window.picking.pick(*mouse_position)
+        if picked_position is not None:
             self.handle_measurement(picked_position)
 
-    def udpate_distance(self, position):
-        distance_mm = self.calculate_distance(
-                self.measurement_start_position, position
-            )
-        midpoint = (
-                (self.measurement_start_position[0] + position[0]) / 2,
-                (self.measurement_start_position[1] + position[1]) / 2,
-                 position[2],
-            )
-        self.add_measurement_text(midpoint, distance_mm)
-
-
     def handle_measurement(self, position):
-        if not self.measurement_active:
-            self.measurement_actor = vtk.vtkBillboardTextActor3D()            
-            self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer().AddActor(
-            self.measurement_actor)
-            self.measurement_start_position = position
-            self.measurement_active = True        
-            self.dynamic_line_source = vtk.vtkLineSource()                   
-          
+        # Loading a model clears the scene, old measurements go with it
+        layer = self.window.scene_layers.measurements
+        if self.measurements.line_actor not in layer:
+            self.measurements.clear()
+            self.active_measurement = None
+            for actor in self.measurements.actors():
+                layer.add(actor)
+
+        if self.active_measurement is None:
+            self.active_measurement = self.measurements.add(position, position)
         else:
-            self.udpate_distance(position=position)
-            self.measurement_active = False
-
-        c = self.random_color()
-            
-        self.draw_line_with_points(self.measurement_start_position, position, c)
-
-    def draw_line_with_points(self, start_position, end_position, c):
-        self._add_saphere(start_position, end_position)
-        # Create a line source for the dynamic line      
-        self.dynamic_line_source.SetPoint1(start_position)
-        self.dynamic_line_source.SetPoint2(end_position)
-        self.dynamic_line_source.Update()
-
-        # Create a mapper and actor for the dynamic line
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(self.dynamic_line_source.GetOutput())
-
-        self.dynamic_line_actor = vtk.vtkActor()
-        self.dynamic_line_actor.SetMapper(mapper)
-        self.dynamic_line_actor.GetProperty().SetColor(self.dynamic_line_color)
-        self.dynamic_line_actor.GetProperty().SetLineWidth(2)
-
-        # Add the dynamic line actor to the renderer
-        renderer = self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer()
-        renderer.AddActor(self.dynamic_line_actor)
+            self.measurements.set_end(self.active_measurement, position)
+            self.active_measurement = None
 
         # Render the scene
-        self.vtk_widget.GetRenderWindow().Render()
-    def on_mouse_move(self, obj, event):
-        if time.time() - self.last_update < 0.1:
+        self.window.render_scheduler.request_render()
+
+    def remove_last_measurement(self):
+        last = self.measurements.last()
+        if last is None:
             return
-        self.last_update = time.time()
+        if last == self.active_measurement:
+            self.active_measurement = None
+        self.measurements.remove(last)
+        self.window.render_scheduler.request_render()
 
-        if self.measurement_active and self.dynamic_line_source:
+    def on_mouse_move(self, obj, event):
+        if self.active_measurement is not None:
             interactor = self.GetInteractor()
             mouse_position = interactor.GetEventPosition()
-            picker = vtk.vtkCellPicker()
-            picker.Pick(
-                mouse_position[0],
-                mouse_position[1],
-                0,
-                self.vtk_widget.GetRenderWindow().GetRenderers().GetFirstRenderer(),
-            )
-            if picker.GetCellId() >= 0:
-                end_position = picker.GetPickPosition()
+            # The shared picker uses a cell locator, no need to throttle
+            end_position = self.window.picking.pick(*mouse_position)
+            if end_position is not None:
                 # Update the endpoint of the dynamic line
-                self.dynamic_line_source.SetPoint1(self.measurement_start_position)
-                self.dynamic_line_source.SetPoint2(end_position)
-                self.dynamic_line_source.Update()
-                self.udpate_distance(end_position)
-                self.vtk_widget.GetRenderWindow().Render() 
- 
\ No newline at end of file
+                self.measurements.set_end(self.active_measurement, end_position)
+                self.window.render_scheduler.request_render()
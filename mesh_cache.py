@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from mass_properties import MassProperties
+from mesh_loader import (
+    MeshData,
+    mesh_to_polydata,
+    mesh_to_smooth_polydata,
+    polydata_to_mesh,
+    smooth_polydata_to_mesh,
+)
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".stl_viewer_cache")
+CACHE_SIZE_LIMIT = 2 * 1024 ** 3  # 2 GB
+
+# How much of the file is hashed: a few blocks spread over the whole file
+HASH_BLOCK_SIZE = 64 * 1024
+HASH_BLOCK_COUNT = 16
+
+META_FILE = "meta.json"
+# Temporary entries this old were left behind by a process that died
+STALE_TEMP_AGE = 24 * 3600
+
+
+def file_key(file_path):
+    # Size and modification time catch almost every change, the sampled
+    # blocks catch files that were replaced without changing either
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(file_path, "rb") as f:
+        step = max(stat.st_size // HASH_BLOCK_COUNT, HASH_BLOCK_SIZE)
+        for offset in range(0, stat.st_size, step):
+            f.seek(offset)
+            digest.update(f.read(HASH_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def _directory_size(path):
+    total = 0
+    for name in os.listdir(path):
+        total += os.path.getsize(os.path.join(path, name))
+    return total
+
+
+def evict_entries(cache_dir, index_file, size_limit, keep=None):
+    # Drop the least recently used entries until the directory fits its
+    # limit. An entry is a directory with an index file, touched on every use.
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        index_path = os.path.join(entry_dir, index_file)
+        if os.path.isfile(index_path):
+            if entry_dir != keep:
+                entries.append((os.path.getmtime(index_path), _directory_size(entry_dir), entry_dir))
+        elif ".tmp" in name and time.time() - os.path.getmtime(entry_dir) > STALE_TEMP_AGE:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    total_size = sum(size for _, size, _ in entries)
+    if keep is not None and os.path.isdir(keep):
+        total_size += _directory_size(keep)
+    for _, size, entry_dir in sorted(entries):
+        if total_size <= size_limit:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total_size -= size
+
+
+class MeshCache:
+    def __init__(self, cache_dir=CACHE_DIR, size_limit=CACHE_SIZE_LIMIT):
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, entry_dir):
+        with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, entry_dir, meta):
+        # Write next to the old file and swap it in, readers never see half a file
+        temp_path = os.path.join(entry_dir, META_FILE + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, os.path.join(entry_dir, META_FILE))
+
+    def _load_array(self, entry_dir, name):
+        # Copy-on-write mapping, pages are only read when VTK touches them
+        return np.load(os.path.join(entry_dir, name + ".npy"), mmap_mode="c")
+
+    def load_mesh(self, file_path):
+        entry_dir = self._entry_dir(file_key(file_path))
+        try:
+            meta = self._read_meta(entry_dir)
+            mesh_data = MeshData(
+                file_path,
+                self._load_array(entry_dir, "points"),
+                self._load_array(entry_dir, "faces"),
+                normals=self._load_array(entry_dir, "normals"),
+                volume=meta["volume"],
+                bounds=tuple(meta["bounds"]),
+            )
+            if meta.get("mass_properties"):
+                mesh_data.mass_properties = MassProperties.from_dict(meta["mass_properties"])
+            for index in range(meta.get("lod_levels", 0)):
+                mesh_data.lod_levels.append(
+                    mesh_to_polydata(
+                        self._load_array(entry_dir, f"lod_{index}_points"),
+                        self._load_array(entry_dir, f"lod_{index}_faces"),
+                    )
+                )
+            if meta.get("smooth_normals"):
+                mesh_data.smooth_polydata = mesh_to_smooth_polydata(
+                    self._load_array(entry_dir, "smooth_points"),
+                    self._load_array(entry_dir, "smooth_faces"),
+                    self._load_array(entry_dir, "smooth_normals"),
+                )
+        except (OSError, ValueError, KeyError) as ex:
+            if os.path.isdir(entry_dir):
+                print(f"Ignoring broken cache entry {entry_dir}: {ex}")
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(os.path.join(entry_dir, META_FILE))
+        return mesh_data
+
+    def store_mesh(self, mesh_data):
+        key = file_key(mesh_data.file_path)
+        entry_dir = self._entry_dir(key)
+        temp_dir = entry_dir + f".tmp{os.getpid()}"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+
+        np.save(os.path.join(temp_dir, "points.npy"), mesh_data.points)
+        np.save(os.path.join(temp_dir, "faces.npy"), mesh_data.faces)
+        np.save(os.path.join(temp_dir, "normals.npy"), mesh_data.normals)
+        self._write_meta(
+            temp_dir,
+            {
+                "file_name": os.path.basename(mesh_data.file_path),
+                "volume": mesh_data.volume,
+                "bounds": list(mesh_data.get_bounds()),
+                "lod_levels": 0,
+                "mass_properties": (
+                    mesh_data.mass_properties.to_dict() if mesh_data.mass_properties is not None else None
+                ),
+            },
+        )
+
+        # Replace any older entry for the same key in one step
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(temp_dir, entry_dir)
+        self.evict()
+
+    def store_lod_levels(self, file_path, levels):
+        entry_dir = self._entry_dir(file_key(file_path))
+        try:
+            meta = self._read_meta(entry_dir)
+        except (OSError, ValueError):
+            return
+
+        for index, level in enumerate(levels):
+            points, faces = polydata_to_mesh(level)
+            np.save(os.path.join(entry_dir, f"lod_{index}_points.npy"), points)
+            np.save(os.path.join(entry_dir, f"lod_{index}_faces.npy"), faces)
+        meta["lod_levels"] = len(levels)
+        self._write_meta(entry_dir, meta)
+        self.evict()
+
+    def store_mass_properties(self, file_path, mass_properties):
+        # For entries stored before they were weighed
+        entry_dir = self._entry_dir(file_key(file_path))
+        try:
+            meta = self._read_meta(entry_dir)
+        except (OSError, ValueError):
+            return
+
+        meta["mass_properties"] = mass_properties.to_dict()
+        self._write_meta(entry_dir, meta)
+
+    def store_smooth_normals(self, file_path, polydata):
+        entry_dir = self._entry_dir(file_key(file_path))
+        try:
+            meta = self._read_meta(entry_dir)
+        except (OSError, ValueError):
+            return
+
+        for name, array in zip(("points", "faces", "normals"), smooth_polydata_to_mesh(polydata)):
+            np.save(os.path.join(entry_dir, f"smooth_{name}.npy"), array)
+        meta["smooth_normals"] = True
+        self._write_meta(entry_dir, meta)
+        self.evict()
+
+    def evict(self):
+        # Tile sets live in their own directory with their own limit
+        evict_entries(self.cache_dir, META_FILE, self.size_limit)
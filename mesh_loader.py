@@ -0,0 +1,153 @@
+import os
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+class MeshData:
+    def __init__(self, file_path, points, faces, normals=None, volume=None, bounds=None, mass_properties=None):
+        self.file_path = file_path
+        # (n_points, 3) float32 vertex buffer, shared with VTK without copying
+        self.points = points
+        # (n_triangles, 3) vertex indices into points
+        self.faces = faces
+        # (n_triangles, 3) float32 facet normals
+        if normals is None:
+            normals = compute_cell_normals(points, faces)
+        self.normals = normals
+        # Filled in by the weight calculation or taken from the cache
+        self.volume = volume
+        self.mass_properties = mass_properties
+        self.bounds = bounds
+        # (center, axes, extents) of the oriented size box, once computed
+        self.oriented_box = None
+        # Decimated versions of the mesh, if they are already known
+        self.lod_levels = []
+        # Copy with point normals split at sharp edges, for smooth shading
+        self.smooth_polydata = None
+        # Findings of the mesh checks, and what the repair changed if it ran
+        self.validation = None
+        self.repair_changes = None
+
+        self.polydata = mesh_to_polydata(points, faces)
+        self.polydata.GetCellData().SetNormals(
+            numpy_support.numpy_to_vtk(self.normals, deep=False)
+        )
+        self.polydata.GetCellData().GetNormals().SetName("Normals")
+
+    def get_bounds(self):
+        if self.bounds is None:
+            self.bounds = self.polydata.GetBounds()
+        return self.bounds
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+def load_mesh(file_path, progress=None, on_preview=None):
+    import stl_reader
+
+    if stl_reader.is_binary_stl(file_path):
+        # The records are read a chunk at a time and welded into an indexed
+        # mesh, the whole file is never held in memory
+        count = len(stl_reader.map_binary_stl(file_path))
+        if on_preview is not None:
+            on_preview(make_preview_polydata(stl_reader.iter_binary_triangles(file_path), count))
+
+        def report(done, total):
+            if progress is not None:
+                size = stl_reader.TRIANGLE_DTYPE.itemsize
+                progress(stl_reader.HEADER_SIZE + done * size, stl_reader.HEADER_SIZE + total * size)
+
+        points, faces = stl_reader.weld_triangles(stl_reader.iter_binary_triangles(file_path), count, report)
+    else:
+        from stl import mesh
+
+        # ASCII files are parsed once by numpy-stl and then welded the same way
+        try:
+            vertices = mesh.Mesh.from_file(file_path).vectors
+        except AssertionError:
+            # numpy-stl asserts on files that are neither ASCII nor binary
+            vertices = np.empty((0, 3, 3), dtype=np.float32)
+        if len(vertices) == 0:
+            raise ValueError(f"{file_path} contains no triangles, it is not a valid STL file")
+        if progress is not None:
+            file_size = os.path.getsize(file_path)
+            progress(file_size, file_size)
+        if on_preview is not None:
+            on_preview(make_preview_polydata([vertices], len(vertices)))
+        points, faces = stl_reader.weld_vertices(vertices)
+        del vertices
+    return MeshData(file_path, points, faces)
+
+
+def make_preview_polydata(chunks, count, max_triangles=200000):
+    # Every n-th triangle gives a quick impression of the model while it is welded
+    step = max(1, int(np.ceil(count / max_triangles)))
+    samples = []
+    done = 0
+    for chunk in chunks:
+        # Continue the stride where the previous chunk left off
+        samples.append(np.array(chunk[-done % step::step], dtype=np.float32))
+        done += len(chunk)
+    points = np.concatenate(samples).reshape(-1, 3) if samples else np.empty((0, 3), dtype=np.float32)
+    faces = np.arange(len(points), dtype=np.int64).reshape(-1, 3)
+    return mesh_to_polydata(points, faces)
+
+
+def compute_cell_normals(points, faces, chunk_size=250000):
+    normals = np.empty((len(faces), 3), dtype=np.float32)
+    for start in range(0, len(faces), chunk_size):
+        triangles = points[faces[start:start + chunk_size]]
+        cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        length = np.linalg.norm(cross, axis=1, keepdims=True)
+        # Degenerate triangles keep a zero normal
+        np.divide(cross, length, out=cross, where=length > 0)
+        normals[start:start + chunk_size] = cross
+    return normals
+
+
+def polydata_to_mesh(polydata):
+    # Pull the point and triangle arrays back out of a triangle-only polydata
+    points = numpy_support.vtk_to_numpy(polydata.GetPoints().GetData())
+    connectivity = numpy_support.vtk_to_numpy(polydata.GetPolys().GetConnectivityArray())
+    return points, connectivity.reshape(-1, 3)
+
+
+def make_triangle_cells(faces):
+    # Build the cell array straight from offsets/connectivity arrays
+    n_triangles = len(faces)
+    offsets = np.arange(0, 3 * n_triangles + 1, 3, dtype=np.int64)
+    connectivity = np.ascontiguousarray(faces, dtype=np.int64).ravel()
+
+    cells = vtk.vtkCellArray()
+    cells.SetData(
+        numpy_support.numpy_to_vtk(offsets, deep=False, array_type=vtk.VTK_ID_TYPE),
+        numpy_support.numpy_to_vtk(connectivity, deep=False, array_type=vtk.VTK_ID_TYPE),
+    )
+    return cells
+
+
+def smooth_polydata_to_mesh(polydata):
+    points, faces = polydata_to_mesh(polydata)
+    return points, faces, numpy_support.vtk_to_numpy(polydata.GetPointData().GetNormals())
+
+
+def mesh_to_smooth_polydata(points, faces, point_normals):
+    polydata = mesh_to_polydata(points, faces)
+    polydata.GetPointData().SetNormals(numpy_support.numpy_to_vtk(point_normals, deep=False))
+    polydata.GetPointData().GetNormals().SetName("Normals")
+    return polydata
+
+
+def mesh_to_polydata(points, faces):
+    # Wrap the numpy vertex buffer, VTK keeps a reference instead of copying it
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(numpy_support.numpy_to_vtk(points, deep=False))
+
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(make_triangle_cells(faces))
+    return polydata
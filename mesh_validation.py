@@ -0,0 +1,213 @@
+import numpy as np
+import vtk
+from PyQt5 import QtCore
+from vtk.util import numpy_support
+
+from mass_properties import accumulate, count_bad_edges, iter_mesh_chunks
+
+# Largest hole the repair closes, in mm across
+MAX_HOLE_SIZE = 10.0
+
+
+class MeshReport:
+    def __init__(
+        self,
+        triangles,
+        boundary_edges,
+        non_manifold_edges,
+        inconsistent_edges,
+        degenerate_faces,
+        duplicate_faces,
+        volume,
+    ):
+        self.triangles = triangles
+        # Edges used by one triangle, or by more than two
+        self.boundary_edges = boundary_edges
+        self.non_manifold_edges = non_manifold_edges
+        # Edges whose two triangles run the same way along it, one of them is flipped
+        self.inconsistent_edges = inconsistent_edges
+        # Triangles with a repeated or collinear corner, and repeated triangles
+        self.degenerate_faces = degenerate_faces
+        self.duplicate_faces = duplicate_faces
+        # Signed, negative when the whole surface faces inwards
+        self.volume = volume
+
+    @property
+    def watertight(self):
+        return self.boundary_edges == 0 and self.non_manifold_edges == 0
+
+    @property
+    def inside_out(self):
+        return self.volume < 0
+
+    @property
+    def valid(self):
+        return (
+            self.watertight
+            and self.inconsistent_edges == 0
+            and self.degenerate_faces == 0
+            and self.duplicate_faces == 0
+            and not self.inside_out
+        )
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def degenerate_mask(points, faces):
+    repeated = (faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) | (faces[:, 2] == faces[:, 0])
+    corners = points[faces].astype(np.float64)
+    cross = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    return repeated | ~np.any(cross, axis=1)
+
+
+def duplicate_mask(faces):
+    # The same three corners in any order, the first copy is kept
+    corners = np.sort(faces, axis=1)
+    order = np.lexsort((corners[:, 2], corners[:, 1], corners[:, 0]))
+    same = np.all(corners[order][1:] == corners[order][:-1], axis=1)
+    mask = np.zeros(len(faces), dtype=bool)
+    mask[order[1:][same]] = True
+    return mask
+
+
+def count_flipped_edges(faces, point_count):
+    # An edge walked the same way twice, by two triangles that disagree
+    start = faces.ravel().astype(np.int64)
+    end = faces[:, [1, 2, 0]].ravel().astype(np.int64)
+    _, counts = np.unique(start * int(point_count) + end, return_counts=True)
+    return int(np.count_nonzero(counts > 1))
+
+
+def signed_volume(points, faces):
+    return accumulate(iter_mesh_chunks(points, faces)).volume
+
+
+def validate_mesh(points, faces, volume=None):
+    faces = np.asarray(faces)
+    degenerate = degenerate_mask(points, faces)
+    duplicate = duplicate_mask(faces) & ~degenerate
+    # Edge checks on the triangles that are left once both are dropped
+    kept = faces[~(degenerate | duplicate)]
+    boundary_edges, non_manifold_edges = count_bad_edges(kept, len(points))
+    if volume is None:
+        volume = signed_volume(points, kept)
+    return MeshReport(
+        triangles=len(faces),
+        boundary_edges=boundary_edges,
+        non_manifold_edges=non_manifold_edges,
+        inconsistent_edges=count_flipped_edges(kept, len(points)),
+        degenerate_faces=int(np.count_nonzero(degenerate)),
+        duplicate_faces=int(np.count_nonzero(duplicate)),
+        volume=float(volume),
+    )
+
+
+def _orient_and_fill(points, faces, fill_holes):
+    from mesh_loader import mesh_to_polydata, polydata_to_mesh
+
+    polydata = mesh_to_polydata(points, faces)
+    if fill_holes:
+        # New triangles are appended after the existing ones
+        fill = vtk.vtkFillHolesFilter()
+        fill.SetInputData(polydata)
+        fill.SetHoleSize(MAX_HOLE_SIZE)
+        triangulate = vtk.vtkTriangleFilter()
+        triangulate.SetInputConnection(fill.GetOutputPort())
+        triangulate.Update()
+        polydata = triangulate.GetOutput()
+
+    # Walk neighbouring triangles and turn them the same way as the first
+    # one. Closed shells are each turned to face outwards, a shell whose first
+    # triangle was the flipped one would otherwise end up inside out.
+    _, filled = polydata_to_mesh(polydata)
+    closed = count_bad_edges(filled, polydata.GetNumberOfPoints()) == (0, 0)
+    normals = vtk.vtkPolyDataNormals()
+    normals.SetInputData(polydata)
+    normals.ConsistencyOn()
+    normals.SplittingOff()
+    normals.SetAutoOrientNormals(closed)
+    # Orienting works on the point normals, with none asked for the filter
+    # passes the mesh through untouched
+    normals.ComputePointNormalsOn()
+    normals.ComputeCellNormalsOn()
+    normals.Update()
+    _, oriented = polydata_to_mesh(normals.GetOutput())
+    new_points = numpy_support.vtk_to_numpy(normals.GetOutput().GetPoints().GetData())
+    return new_points, oriented.astype(np.int64)
+
+
+def repair_mesh(points, faces, fill_holes=True):
+    # Returns the repaired points and faces and what was changed
+    faces = np.asarray(faces, dtype=np.int64)
+    degenerate = degenerate_mask(points, faces)
+    duplicate = duplicate_mask(faces) & ~degenerate
+    kept = faces[~(degenerate | duplicate)]
+
+    repaired_points, repaired = _orient_and_fill(points, kept, fill_holes)
+    # Reversed triangles keep their middle corner, the others are untouched
+    original = repaired[:len(kept)]
+    flipped = int(np.count_nonzero(np.any(original != kept, axis=1)))
+    filled = len(repaired) - len(kept)
+
+    inverted = signed_volume(repaired_points, repaired) < 0
+    if inverted:
+        repaired = repaired[:, ::-1].copy()
+
+    changes = {
+        "removed_faces": int(len(faces) - len(kept)),
+        "flipped_faces": flipped,
+        "filled_faces": int(filled),
+        "inverted": bool(inverted),
+    }
+    return repaired_points, repaired, changes
+
+
+def repair_mesh_data(mesh_data, fill_holes=True):
+    from mesh_loader import MeshData
+
+    points, faces, changes = repair_mesh(mesh_data.points, mesh_data.faces, fill_holes)
+    repaired = MeshData(mesh_data.file_path, np.array(points, dtype=np.float32), faces)
+    repaired.repair_changes = changes
+    return repaired
+
+
+def format_validation_text(report, changes=None):
+    text = ""
+    if changes is not None and any(changes.values()):
+        text += "Repaired: {} removed, {} flipped, {} added{}\n".format(
+            changes["removed_faces"],
+            changes["flipped_faces"],
+            changes["filled_faces"],
+            ", turned outside in" if changes["inverted"] else "",
+        )
+    if report.valid:
+        return text + "Mesh OK\n"
+    for count, label in (
+        (report.boundary_edges, "Open edges"),
+        (report.non_manifold_edges, "Non-manifold edges"),
+        (report.inconsistent_edges, "Flipped edges"),
+        (report.degenerate_faces, "Degenerate faces"),
+        (report.duplicate_faces, "Duplicate faces"),
+    ):
+        if count:
+            text += f"{label}: {count}\n"
+    if report.inside_out:
+        text += "Inside out\n"
+    return text
+
+
+class MeshValidator(QtCore.QThread):
+    report_ready = QtCore.pyqtSignal(object)
+
+    def __init__(self, mesh_data, parent=None):
+        super(MeshValidator, self).__init__(parent)
+        self.mesh_data = mesh_data
+
+    def run(self):
+        volume = None
+        if self.mesh_data.mass_properties is not None:
+            volume = self.mesh_data.mass_properties.volume
+        report = validate_mesh(self.mesh_data.points, self.mesh_data.faces, volume)
+        if not self.isInterruptionRequested():
+            self.report_ready.emit(report)
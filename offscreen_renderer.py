@@ -0,0 +1,262 @@
+import math
+
+import vtk
+from vtk.util import numpy_support
+
+# Direction from the model towards the camera and the view up of each named view
+VIEWS = {
+    "front": ((0, -1, 0), (0, 0, 1)),
+    "back": ((0, 1, 0), (0, 0, 1)),
+    "left": ((-1, 0, 0), (0, 0, 1)),
+    "right": ((1, 0, 0), (0, 0, 1)),
+    "top": ((0, 0, 1), (0, 1, 0)),
+    "bottom": ((0, 0, -1), (0, -1, 0)),
+    "iso": ((1, -1, 1), (0, 0, 1)),
+}
+
+# Window relative coordinate systems and their per-viewport equivalents
+VIEWPORT_COORDINATES = {
+    vtk.VTK_DISPLAY: vtk.VTK_VIEWPORT,
+    vtk.VTK_NORMALIZED_DISPLAY: vtk.VTK_NORMALIZED_VIEWPORT,
+}
+
+
+class OffscreenRenderer:
+    def __init__(self, width=1200, height=800):
+        # A render window of its own that never shows up on screen
+        self.render_window = vtk.vtkRenderWindow()
+        self.render_window.SetOffScreenRendering(1)
+        self.render_window.SetSize(width, height)
+        self.renderer = vtk.vtkRenderer()
+        self.render_window.AddRenderer(self.renderer)
+        # Mirrors of on-screen props, keyed by the prop they copy
+        self._mirrors = {}
+
+    def finalize(self):
+        # Release the graphics context from the thread that rendered with it
+        self.render_window.Finalize()
+
+    def set_size(self, width, height):
+        self.render_window.SetSize(width, height)
+
+    def sync_scene(self, renderer, snapshot_props=()):
+        # Rebuild the scene from an on-screen renderer, reusing earlier mirrors
+        # so their graphics resources stay on this context. The data of the
+        # props in snapshot_props is copied, for mirrors rendered by another
+        # thread while the user keeps editing the originals.
+        mirrors = {}
+        self.renderer.RemoveAllViewProps()
+        props = renderer.GetViewProps()
+        props.InitTraversal()
+        for _ in range(props.GetNumberOfItems()):
+            prop = props.GetNextProp()
+            snapshot = prop in snapshot_props
+            mirror = self._update_mirror(prop, None if snapshot else self._mirrors.get(prop))
+            if mirror is not None and snapshot:
+                self._snapshot(prop, mirror)
+            if mirror is not None:
+                mirror.SetVisibility(prop.GetVisibility())
+                self.renderer.AddViewProp(mirror)
+                mirrors[prop] = mirror
+        self._mirrors = mirrors
+
+        self.renderer.SetBackground(renderer.GetBackground())
+        self.renderer.SetUseDepthPeeling(renderer.GetUseDepthPeeling())
+        self.renderer.SetMaximumNumberOfPeels(renderer.GetMaximumNumberOfPeels())
+        self.copy_camera(renderer.GetActiveCamera())
+
+    def copy_camera(self, camera):
+        # The on-screen camera is only read, never moved
+        self.renderer.GetActiveCamera().DeepCopy(camera)
+        self.renderer.ResetCameraClippingRange()
+
+    def _update_mirror(self, prop, mirror):
+        if prop.IsA("vtkBillboardTextActor3D"):
+            if mirror is None:
+                mirror = vtk.vtkBillboardTextActor3D()
+            mirror.SetInput(prop.GetInput())
+            mirror.SetPosition(prop.GetPosition())
+            mirror.SetTextProperty(prop.GetTextProperty())
+        elif prop.IsA("vtkTextActor"):
+            if mirror is None:
+                mirror = vtk.vtkTextActor()
+            mirror.SetInput(prop.GetInput())
+            mirror.SetTextScaleMode(prop.GetTextScaleMode())
+            self._copy_position(prop, mirror)
+            mirror.SetTextProperty(prop.GetTextProperty())
+        elif prop.IsA("vtkActor"):
+            mapper = prop.GetMapper()
+            if mapper is None:
+                return None
+            # A new mapper shares the input data but keeps its own buffers
+            if mirror is None or mirror.GetMapper().GetInput() is not mapper.GetInput():
+                mirror = vtk.vtkActor()
+                mirror_mapper = mapper.NewInstance()
+                mirror_mapper.ShallowCopy(mapper)
+                if mapper.IsA("vtkGlyph3DMapper"):
+                    # Not every mapper copies its inputs, glyphs need their source too
+                    for port in range(mapper.GetNumberOfInputPorts()):
+                        mirror_mapper.SetInputConnection(port, mapper.GetInputConnection(port, 0))
+                    mirror_mapper.SetScaling(mapper.GetScaling())
+                mirror.SetMapper(mirror_mapper)
+            mirror.SetProperty(prop.GetProperty())
+            mirror.SetUserMatrix(prop.GetUserMatrix())
+        elif prop.IsA("vtkActor2D") and prop.GetMapper() is not None and prop.GetMapper().IsA("vtkLabeledDataMapper"):
+            mapper = prop.GetMapper()
+            if mirror is None:
+                mirror = vtk.vtkActor2D()
+                mirror.SetMapper(vtk.vtkLabeledDataMapper())
+            mirror.GetMapper().SetInputConnection(mapper.GetInputConnection(0, 0))
+            mirror.GetMapper().SetLabelMode(mapper.GetLabelMode())
+            mirror.GetMapper().SetFieldDataName(mapper.GetFieldDataName())
+            mirror.GetMapper().SetLabelTextProperty(mapper.GetLabelTextProperty())
+        elif prop.IsA("vtkActor2D") and prop.GetMapper() is not None and prop.GetMapper().IsA("vtkImageMapper"):
+            mapper = prop.GetMapper()
+            if mirror is None:
+                mirror = vtk.vtkActor2D()
+                mirror.SetMapper(vtk.vtkImageMapper())
+            mirror.GetMapper().SetInputConnection(mapper.GetInputConnection(0, 0))
+            mirror.GetMapper().SetColorWindow(mapper.GetColorWindow())
+            mirror.GetMapper().SetColorLevel(mapper.GetColorLevel())
+            self._copy_position(prop, mirror)
+        return mirror
+
+    def _snapshot(self, prop, mirror):
+        # Deep copies of the data as it is now, and of the properties
+        mapper = prop.GetMapper() if prop.IsA("vtkActor") or prop.IsA("vtkActor2D") else None
+        if mapper is not None:
+            for port in range(mapper.GetNumberOfInputPorts()):
+                if mapper.GetNumberOfInputConnections(port) == 0:
+                    continue
+                producer = mapper.GetInputAlgorithm(port, 0)
+                producer.Update()
+                data = producer.GetOutputDataObject(mapper.GetInputConnection(port, 0).GetIndex())
+                copy = data.NewInstance()
+                copy.DeepCopy(data)
+                mirror.GetMapper().SetInputDataObject(port, copy)
+        if prop.IsA("vtkActor") and not prop.IsA("vtkBillboardTextActor3D"):
+            properties = vtk.vtkProperty()
+            properties.DeepCopy(prop.GetProperty())
+            mirror.SetProperty(properties)
+        if prop.IsA("vtkTextActor") or prop.IsA("vtkBillboardTextActor3D"):
+            text_property = vtk.vtkTextProperty()
+            text_property.ShallowCopy(prop.GetTextProperty())
+            mirror.SetTextProperty(text_property)
+        elif mapper is not None and mapper.IsA("vtkLabeledDataMapper"):
+            text_property = vtk.vtkTextProperty()
+            text_property.ShallowCopy(mapper.GetLabelTextProperty())
+            mirror.GetMapper().SetLabelTextProperty(text_property)
+
+    def _copy_position(self, prop, mirror):
+        coordinate = prop.GetPositionCoordinate()
+        mirror.GetPositionCoordinate().SetCoordinateSystem(coordinate.GetCoordinateSystem())
+        mirror.GetPositionCoordinate().SetValue(coordinate.GetValue())
+
+    def add_actor(self, actor):
+        self.renderer.AddActor(actor)
+
+    def add_text(self, text, position, color=(0.0, 0.0, 1.0), font_size=20):
+        text_actor = vtk.vtkTextActor()
+        text_actor.SetTextScaleModeToNone()
+        text_actor.GetPositionCoordinate().SetCoordinateSystemToNormalizedDisplay()
+        text_actor.SetPosition(*position)
+        text_actor.SetInput(text)
+        text_actor.GetTextProperty().SetColor(color)
+        text_actor.GetTextProperty().SetFontSize(font_size)
+        self.renderer.AddActor(text_actor)
+        return text_actor
+
+    def reset_camera(self):
+        self.renderer.ResetCamera()
+
+    def render_image(self):
+        self.render_window.Render()
+        window_to_image_filter = vtk.vtkWindowToImageFilter()
+        window_to_image_filter.SetInput(self.render_window)
+        window_to_image_filter.ReadFrontBufferOff()
+        window_to_image_filter.Update()
+
+        # View the pixels as a numpy array, rows go bottom to top in VTK
+        vtk_image = window_to_image_filter.GetOutput()
+        width, height, _ = vtk_image.GetDimensions()
+        scalars = vtk_image.GetPointData().GetScalars()
+        pixels = numpy_support.vtk_to_numpy(scalars)
+        return pixels.reshape(height, width, scalars.GetNumberOfComponents())[::-1]
+
+    def set_view(self, view_name, renderer=None):
+        renderer = renderer if renderer is not None else self.renderer
+        direction, view_up = VIEWS[view_name]
+        bounds = renderer.ComputeVisiblePropBounds()
+        center = [(bounds[i] + bounds[i + 1]) / 2.0 for i in range(0, 6, 2)]
+
+        camera = renderer.GetActiveCamera()
+        camera.SetFocalPoint(center)
+        camera.SetPosition([c + d for c, d in zip(center, direction)])
+        camera.SetViewUp(view_up)
+        # Fit the model, keeping the direction
+        renderer.ResetCamera()
+
+    def render_views(self, view_names, progress=None):
+        # Every view gets a viewport of one big window, so all of them come
+        # out of a single render and a single read back
+        count = len(view_names)
+        columns = int(math.ceil(math.sqrt(count)))
+        rows = int(math.ceil(count / columns))
+        width, height = self.render_window.GetSize()
+
+        props = self.renderer.GetViewProps()
+        props.InitTraversal()
+        props = [props.GetNextProp() for _ in range(props.GetNumberOfItems())]
+        # Overlays placed relative to the whole window go relative to their tile
+        display_coordinates = self._use_viewport_coordinates(props)
+
+        renderers = [self.renderer]
+        for _ in range(count - 1):
+            renderer = vtk.vtkRenderer()
+            renderer.SetBackground(self.renderer.GetBackground())
+            for prop in props:
+                renderer.AddViewProp(prop)
+            self.render_window.AddRenderer(renderer)
+            renderers.append(renderer)
+
+        try:
+            for index, (view_name, renderer) in enumerate(zip(view_names, renderers)):
+                column, row = index % columns, index // columns
+                renderer.SetViewport(
+                    column / columns,
+                    1.0 - (row + 1) / rows,
+                    (column + 1) / columns,
+                    1.0 - row / rows,
+                )
+                self.set_view(view_name, renderer)
+
+            self.render_window.SetSize(width * columns, height * rows)
+            pixels = self.render_image()
+            images = []
+            for index in range(count):
+                column, row = index % columns, index // columns
+                tile = pixels[row * height:(row + 1) * height, column * width:(column + 1) * width]
+                images.append(tile.copy())
+                if progress is not None:
+                    progress(index + 1, count)
+        finally:
+            for renderer in renderers[1:]:
+                renderer.RemoveAllViewProps()
+                self.render_window.RemoveRenderer(renderer)
+            self.renderer.SetViewport(0.0, 0.0, 1.0, 1.0)
+            self.render_window.SetSize(width, height)
+            for coordinate, system in display_coordinates:
+                coordinate.SetCoordinateSystem(system)
+        return images
+
+    def _use_viewport_coordinates(self, props):
+        changed = []
+        for prop in props:
+            if not prop.IsA("vtkActor2D"):
+                continue
+            for coordinate in (prop.GetPositionCoordinate(), prop.GetPosition2Coordinate()):
+                system = coordinate.GetCoordinateSystem()
+                if system in VIEWPORT_COORDINATES:
+                    coordinate.SetCoordinateSystem(VIEWPORT_COORDINATES[system])
+                    changed.append((coordinate, system))
+        return changed
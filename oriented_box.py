@@ -0,0 +1,186 @@
+import numpy as np
+from PyQt5 import QtCore
+
+# Directions the hull is sampled in, every point extreme along one of them
+# is a hull vertex. The second pass packs directions into narrow cones
+# around the face normals of the first box.
+HULL_DIRECTIONS = 128
+FACE_DIRECTIONS = 24
+FACE_CONE_ANGLE = np.radians(6.0)
+CHUNK_SIZE = 100000
+
+
+def sphere_directions(count):
+    # Fibonacci spiral, evenly spread over the sphere
+    index = np.arange(count) + 0.5
+    z = 1.0 - 2.0 * index / count
+    radius = np.sqrt(1.0 - z * z)
+    angle = np.pi * (1.0 + 5 ** 0.5) * index
+    return np.column_stack((radius * np.cos(angle), radius * np.sin(angle), z))
+
+
+def face_directions(axes, count=FACE_DIRECTIONS, angle=FACE_CONE_ANGLE):
+    # Rings of directions around each axis, the opposite faces come from the
+    # minimum side of the same projection
+    rings = []
+    for index in range(3):
+        normal = axes[index]
+        tangent, bitangent = np.delete(axes, index, axis=0)
+        turn = np.linspace(0.0, 2.0 * np.pi, count, endpoint=False)
+        tilt = angle * (1 + np.arange(count) % 3) / 3
+        rings.append(
+            np.cos(tilt)[:, None] * normal
+            + np.sin(tilt)[:, None] * (np.cos(turn)[:, None] * tangent + np.sin(turn)[:, None] * bitangent)
+        )
+    return np.concatenate([axes] + rings)
+
+
+def hull_points(points, directions, chunk_size=CHUNK_SIZE):
+    # Extreme points of the mesh along each direction, an inner approximation
+    # of the convex hull with at most two points per direction
+    directions = np.asarray(directions).astype(points.dtype)
+    rows = np.arange(len(directions))
+    best = np.full(len(directions), -np.inf)
+    best_points = np.zeros((len(directions), 3))
+    worst = np.full(len(directions), np.inf)
+    worst_points = np.zeros((len(directions), 3))
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        # One row per direction keeps the reductions on contiguous memory
+        projection = directions @ chunk.T
+        high = projection.argmax(axis=1)
+        low = projection.argmin(axis=1)
+        high_values = projection[rows, high]
+        low_values = projection[rows, low]
+        better = high_values > best
+        best[better] = high_values[better]
+        best_points[better] = chunk[high[better]]
+        lower = low_values < worst
+        worst[lower] = low_values[lower]
+        worst_points[lower] = chunk[low[lower]]
+    return np.unique(np.concatenate((best_points, worst_points)), axis=0)
+
+
+def convex_hull_2d(points):
+    # Monotone chain, counter-clockwise without the closing point
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    points = points[order]
+
+    def half(sequence):
+        chain = []
+        for point in sequence:
+            while len(chain) >= 2:
+                a, b = chain[-2], chain[-1]
+                if (b[0] - a[0]) * (point[1] - a[1]) - (b[1] - a[1]) * (point[0] - a[0]) > 0:
+                    break
+                chain.pop()
+            chain.append(point)
+        return chain[:-1]
+
+    return np.array(half(points) + half(points[::-1]))
+
+
+def min_area_rectangle(points):
+    # Rotating calipers: the smallest rectangle has a side on a hull edge,
+    # so only the edge directions need to be tried
+    hull = convex_hull_2d(points)
+    if len(hull) < 3:
+        return np.eye(2)
+    edges = np.roll(hull, -1, axis=0) - hull
+    edges /= np.linalg.norm(edges, axis=1)[:, None]
+    normals = np.column_stack((-edges[:, 1], edges[:, 0]))
+    along = hull @ edges.T
+    across = hull @ normals.T
+    areas = np.ptp(along, axis=0) * np.ptp(across, axis=0)
+    best = int(np.argmin(areas))
+    return np.array([edges[best], normals[best]])
+
+
+def box_volume(points, axes):
+    return np.prod(np.ptp(points @ axes.T, axis=0))
+
+
+def candidate_frames(points, axes):
+    # Keep each axis in turn and fit the smallest rectangle in the plane of
+    # the other two
+    for height in range(3):
+        plane = np.delete(axes, height, axis=0)
+        rectangle = min_area_rectangle(points @ plane.T) @ plane
+        frame = np.array([rectangle[0], rectangle[1], axes[height]])
+        yield frame / np.linalg.norm(frame, axis=1)[:, None]
+
+
+def fit_axes(hull, axes, refinements):
+    volume = box_volume(hull, axes)
+    for _ in range(refinements):
+        improved = False
+        for frame in candidate_frames(hull, axes):
+            frame_volume = box_volume(hull, frame)
+            if frame_volume < volume * (1.0 - 1e-9):
+                axes, volume, improved = frame, frame_volume, True
+        if not improved:
+            break
+    return axes
+
+
+def projected_range(points, center, axes):
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    for start in range(0, len(points), CHUNK_SIZE):
+        projection = (points[start:start + CHUNK_SIZE] - center) @ axes.T
+        lower = np.minimum(lower, projection.min(axis=0))
+        upper = np.maximum(upper, projection.max(axis=0))
+    return lower, upper
+
+
+def oriented_bounding_box(points, refinements=3):
+    # Returns center, axes (one unit vector per row) and extents of a tight
+    # box, found on the hull and sized on every point so it always encloses
+    # the mesh
+    points = np.asarray(points)
+    hull = hull_points(points, sphere_directions(HULL_DIRECTIONS)).astype(np.float64)
+    center = hull.mean(axis=0)
+    hull = hull - center
+
+    # Start from the principal axes of the hull, or the model axes when
+    # those already fit better
+    _, vectors = np.linalg.eigh(np.cov(hull.T))
+    axes = vectors.T
+    if box_volume(hull, np.eye(3)) < box_volume(hull, axes):
+        axes = np.eye(3)
+    axes = fit_axes(hull, axes, refinements)
+
+    # The faces of the box rest on the hull points near its face normals,
+    # sample those more densely and fit again
+    near_faces = hull_points(points, face_directions(axes)).astype(np.float64) - center
+    hull = np.unique(np.concatenate((hull, near_faces)), axis=0)
+    axes = fit_axes(hull, axes, refinements)
+
+    lower, upper = projected_range(points, center, axes)
+    # Never worse than the axis-aligned box
+    aligned_lower, aligned_upper = projected_range(points, center, np.eye(3))
+    if np.prod(aligned_upper - aligned_lower) <= np.prod(upper - lower):
+        axes, lower, upper = np.eye(3), aligned_lower, aligned_upper
+
+    # Right-handed and ordered from the longest to the shortest side
+    extents = upper - lower
+    order = np.argsort(-extents)
+    axes, lower, upper, extents = axes[order], lower[order], upper[order], extents[order]
+    if np.dot(np.cross(axes[0], axes[1]), axes[2]) < 0:
+        axes[2] = -axes[2]
+        lower[2], upper[2] = -upper[2], -lower[2]
+    box_center = center + ((lower + upper) / 2.0) @ axes
+    return box_center, axes, extents
+
+
+class OrientedBoxBuilder(QtCore.QThread):
+    box_ready = QtCore.pyqtSignal(object)
+
+    def __init__(self, points, parent=None):
+        super(OrientedBoxBuilder, self).__init__(parent)
+        self.points = points
+
+    def run(self):
+        box = oriented_bounding_box(self.points)
+        if not self.isInterruptionRequested():
+            self.box_ready.emit(box)
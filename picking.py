@@ -0,0 +1,174 @@
+import vtk
+from PyQt5 import QtCore
+
+
+class LocatorBuilder(QtCore.QThread):
+    locator_ready = QtCore.pyqtSignal(object)
+
+    def __init__(self, polydata, parent=None):
+        super(LocatorBuilder, self).__init__(parent)
+        self.polydata = polydata
+
+    def run(self):
+        locator = vtk.vtkStaticCellLocator()
+        locator.SetDataSet(self.polydata)
+        locator.BuildLocator()
+        if not self.isInterruptionRequested():
+            self.locator_ready.emit(locator)
+
+
+class IdBufferPicker:
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.actor = None
+        self.polydata = None
+        self.view_state = None
+
+        # Cell ids of the whole view, rendered by the same OpenGL context as
+        # the scene (Mesa on machines without a GPU)
+        self.selector = vtk.vtkHardwareSelector()
+        self.selector.SetRenderer(renderer)
+        self.selector.SetFieldAssociation(vtk.vtkDataObject.FIELD_ASSOCIATION_CELLS)
+
+    def set_model(self, actor):
+        self.actor = actor
+        self.view_state = None
+
+    def _current_view_state(self):
+        camera = self.renderer.GetActiveCamera()
+        return (
+            camera.GetPosition(),
+            camera.GetFocalPoint(),
+            camera.GetViewUp(),
+            camera.GetViewAngle(),
+            camera.GetParallelScale(),
+            camera.GetParallelProjection(),
+            self.renderer.GetSize(),
+            self.renderer.GetOrigin(),
+            self.actor.GetMapper().GetInput(),
+        )
+
+    def _capture(self, view_state):
+        # Only the model goes into the buffer, strokes and markers drawn on
+        # top of it must not hide it
+        props = self.renderer.GetViewProps()
+        props.InitTraversal()
+        others = []
+        for _ in range(props.GetNumberOfItems()):
+            prop = props.GetNextProp()
+            if prop is not self.actor and prop.GetPickable():
+                prop.PickableOff()
+                others.append(prop)
+
+        origin = self.renderer.GetOrigin()
+        width, height = self.renderer.GetSize()
+        self.selector.SetArea(origin[0], origin[1], origin[0] + width - 1, origin[1] + height - 1)
+        captured = self.selector.CaptureBuffers()
+        for prop in others:
+            prop.PickableOn()
+
+        self.polydata = self.actor.GetMapper().GetInput()
+        self.view_state = view_state if captured else None
+
+    def pick(self, x, y):
+        view_state = self._current_view_state()
+        if view_state != self.view_state:
+            self._capture(view_state)
+            if self.view_state is None:
+                return None
+
+        # Reads the captured buffers, nothing is rendered here
+        selection = self.selector.GenerateSelection(x, y, x, y)
+        if selection.GetNumberOfNodes() == 0:
+            return None
+        node = selection.GetNode(0)
+        if node.GetProperties().Get(vtk.vtkSelectionNode.PROP()) is not self.actor:
+            return None
+        cell_ids = node.GetSelectionList()
+        if cell_ids.GetNumberOfTuples() == 0:
+            return None
+        return self._intersect_cell(cell_ids.GetValue(0), x, y)
+
+    def _intersect_cell(self, cell_id, x, y):
+        # The world position is where the ray through the pixel meets the
+        # plane of the picked triangle
+        points = self.polydata.GetCell(cell_id).GetPoints()
+        p0, p1, p2 = (list(points.GetPoint(i)) for i in range(3))
+        normal = [0.0, 0.0, 0.0]
+        vtk.vtkTriangle.ComputeNormal(p0, p1, p2, normal)
+
+        near = self._display_to_world(x, y, 0.0)
+        far = self._display_to_world(x, y, 1.0)
+        t = vtk.reference(0.0)
+        position = [0.0, 0.0, 0.0]
+        if not vtk.vtkPlane.IntersectWithLine(near, far, normal, p0, t, position):
+            return None
+        return tuple(position)
+
+    def _display_to_world(self, x, y, z):
+        self.renderer.SetDisplayPoint(x, y, z)
+        self.renderer.DisplayToWorld()
+        world = self.renderer.GetWorldPoint()
+        return [world[i] / world[3] for i in range(3)]
+
+
+class PickingService(QtCore.QObject):
+    def __init__(self, renderer, parent=None):
+        super(PickingService, self).__init__(parent)
+        self.renderer = renderer
+        self.actor = None
+        self.locator_builder = None
+
+        # One picker for every interactor style, it only looks at the model
+        self.picker = vtk.vtkCellPicker()
+        self.picker.SetTolerance(0.001)
+        self.picker.PickFromListOn()
+
+        # Alternative for dense meshes: one cell id buffer per view
+        self.id_buffer_picker = IdBufferPicker(renderer)
+        self.use_id_buffer = False
+
+    def set_use_id_buffer(self, use_id_buffer):
+        self.use_id_buffer = use_id_buffer
+
+    def set_model(self, actor, polydata=None):
+        # Index the full resolution mesh once, picks walk the whole mesh
+        # only until the index is ready. The picker only uses an index built
+        # on the mapper input, so it is built again when that is swapped.
+        if polydata is None:
+            polydata = actor.GetMapper().GetInput()
+        self.clear()
+        self.actor = actor
+        self.picker.AddPickList(actor)
+        self.id_buffer_picker.set_model(actor)
+        self.locator_builder = LocatorBuilder(polydata, self)
+        self.locator_builder.locator_ready.connect(self.on_locator_ready)
+        self.locator_builder.start()
+
+    def clear(self):
+        if self.locator_builder is not None:
+            self.locator_builder.requestInterruption()
+        self.actor = None
+        self.id_buffer_picker.set_model(None)
+        self.picker.InitializePickList()
+        self.picker.RemoveAllLocators()
+
+    def wait(self):
+        if self.locator_builder is not None:
+            self.locator_builder.wait()
+
+    def on_locator_ready(self, locator):
+        # Ignore the index of a model that has been replaced in the meantime
+        if self.sender() is self.locator_builder and self.actor is not None:
+            self.picker.AddLocator(locator)
+
+    def pick(self, x, y):
+        # World position of the model under the display position, or None
+        if self.actor is None:
+            return None
+        if self.use_id_buffer:
+            return self.id_buffer_picker.pick(x, y)
+        self.picker.Pick(x, y, 0, self.renderer)
+        if self.picker.GetCellId() < 0:
+            return None
+        return self.picker.GetPickPosition()
@@ -0,0 +1,46 @@
+import time
+
+from PyQt5 import QtCore
+
+# Never draw more often than a 60 Hz display can show
+MIN_FRAME_INTERVAL = 1.0 / 60
+
+
+class RenderScheduler(QtCore.QObject):
+    def __init__(self, render_window, parent=None):
+        super(RenderScheduler, self).__init__(parent)
+        self.render_window = render_window
+        # Requests since start and the renders they turned into
+        self.requested_count = 0
+        self.performed_count = 0
+
+        # The timer fires once the event loop is idle again, so all requests
+        # made while handling one event share one render
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.render_now)
+        self.last_render_time = 0.0
+
+        # A frame drawn by someone else, like the interactor style while the
+        # camera moves, already shows whatever was pending
+        self.render_window.AddObserver("StartEvent", self.on_render_started)
+
+    def request_render(self):
+        self.requested_count += 1
+        if not self.timer.isActive():
+            # Right after a frame, wait for the next display refresh
+            wait = MIN_FRAME_INTERVAL - (time.perf_counter() - self.last_render_time)
+            self.timer.start(max(0, int(wait * 1000)))
+
+    def render_now(self):
+        self.timer.stop()
+        self.performed_count += 1
+        self.render_window.Render()
+
+    def on_render_started(self, obj, event):
+        self.timer.stop()
+        self.last_render_time = time.perf_counter()
+
+    def reset_counters(self):
+        self.requested_count = 0
+        self.performed_count = 0
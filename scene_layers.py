@@ -0,0 +1,79 @@
+class SceneLayer:
+    def __init__(self, renderer, name):
+        self.renderer = renderer
+        self.name = name
+        self.props = []
+        # State every prop of the layer follows, props added later included
+        self.visible = True
+        self.opacity = None
+        self.wireframe = None
+
+    def __contains__(self, prop):
+        return prop in self.props
+
+    def __iter__(self):
+        return iter(self.props)
+
+    def add(self, prop):
+        if prop in self.props:
+            return
+        self.props.append(prop)
+        self._apply(prop)
+        self.renderer.AddViewProp(prop)
+
+    def remove(self, prop):
+        if prop in self.props:
+            self.props.remove(prop)
+            self.renderer.RemoveViewProp(prop)
+
+    def clear(self):
+        for prop in self.props:
+            self.renderer.RemoveViewProp(prop)
+        self.props = []
+
+    def set_visible(self, visible):
+        self.visible = visible
+        for prop in self.props:
+            prop.SetVisibility(visible)
+
+    def set_opacity(self, opacity):
+        self.opacity = opacity
+        for prop in self.props:
+            prop.GetProperty().SetOpacity(opacity)
+
+    def set_wireframe(self, wireframe):
+        self.wireframe = wireframe
+        for prop in self.props:
+            self._apply_representation(prop)
+
+    def _apply(self, prop):
+        prop.SetVisibility(self.visible)
+        if self.opacity is not None:
+            prop.GetProperty().SetOpacity(self.opacity)
+        if self.wireframe is not None:
+            self._apply_representation(prop)
+
+    def _apply_representation(self, prop):
+        if self.wireframe:
+            prop.GetProperty().SetRepresentationToWireframe()
+        else:
+            prop.GetProperty().SetRepresentationToSurface()
+
+
+class SceneLayers:
+    # Everything in the renderer belongs to exactly one of these
+    NAMES = ("model", "size_annotations", "measurements", "drawings", "annotations", "overlays")
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        for name in self.NAMES:
+            setattr(self, name, SceneLayer(renderer, name))
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.NAMES)
+
+    def clear(self, keep=("overlays",)):
+        # Drop the props of a loaded model, the overlays stay
+        for layer in self:
+            if layer.name not in keep:
+                layer.clear()
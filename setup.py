@@ -25,10 +25,28 @@ setup(
     # Add all your top-level modules here
     py_modules=[
         'annotation_interactor',
+        'batch_report',
         'custom_pdf',
         'drawing_interactor',
+        'load_worker',
+        'lod',
         'main',
         'main_window',
+        'mass_properties',
+        'materials',
         'measurement_interactor',
+        'mesh_cache',
+        'mesh_loader',
+        'mesh_validation',
+        'offscreen_renderer',
+        'oriented_box',
+        'picking',
+        'render_scheduler',
+        'scene_layers',
+        'shading',
+        'stl_reader',
+        'tile_cache',
+        'transparency',
+        'turntable',
     ],
 )
@@ -0,0 +1,57 @@
+import vtk
+from PyQt5 import QtCore
+
+# Edges sharper than this stay crisp, softer ones are shaded across
+FEATURE_ANGLE = 30.0
+
+
+def compute_smooth_normals(polydata, feature_angle=FEATURE_ANGLE, normals_filter=None):
+    if polydata.GetNumberOfCells() == 0:
+        # Nothing to shade, the filter would drop the points as well
+        empty = vtk.vtkPolyData()
+        empty.ShallowCopy(polydata)
+        normals = vtk.vtkFloatArray()
+        normals.SetNumberOfComponents(3)
+        normals.SetName("Normals")
+        empty.GetPointData().SetNormals(normals)
+        empty.GetCellData().RemoveArray("Normals")
+        return empty
+    if normals_filter is None:
+        normals_filter = vtk.vtkPolyDataNormals()
+    normals_filter.SetInputData(polydata)
+    normals_filter.SetFeatureAngle(feature_angle)
+    # Vertices on sharp edges are split so each side keeps its own normal
+    normals_filter.SplittingOn()
+    # The welded triangles keep their order and winding, so cell ids stay
+    # the same as in the flat mesh and picking is not affected
+    normals_filter.ConsistencyOff()
+    normals_filter.AutoOrientNormalsOff()
+    normals_filter.ComputePointNormalsOn()
+    normals_filter.ComputeCellNormalsOff()
+    normals_filter.Update()
+    if normals_filter.GetAbortExecute():
+        return None
+
+    smooth = vtk.vtkPolyData()
+    smooth.ShallowCopy(normals_filter.GetOutput())
+    # Without the facet normals the mapper interpolates the point normals
+    smooth.GetCellData().RemoveArray("Normals")
+    return smooth
+
+
+class NormalsBuilder(QtCore.QThread):
+    normals_ready = QtCore.pyqtSignal(object)
+
+    def __init__(self, polydata, parent=None):
+        super(NormalsBuilder, self).__init__(parent)
+        self.polydata = polydata
+        self.normals_filter = vtk.vtkPolyDataNormals()
+
+    def run(self):
+        smooth = compute_smooth_normals(self.polydata, normals_filter=self.normals_filter)
+        if smooth is not None and not self.isInterruptionRequested():
+            self.normals_ready.emit(smooth)
+
+    def cancel(self):
+        self.requestInterruption()
+        self.normals_filter.SetAbortExecute(1)
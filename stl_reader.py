@@ -0,0 +1,190 @@
+import os
+import re
+
+import numpy as np
+
+# Binary STL layout: 80 byte header, uint32 triangle count, then 50 byte records
+HEADER_SIZE = 84
+TRIANGLE_DTYPE = np.dtype(
+    [
+        ("normal", "<f4", (3,)),
+        ("vertices", "<f4", (3, 3)),
+        ("attributes", "<u2"),
+    ]
+)
+
+
+def binary_triangle_count(file_path):
+    # Number of triangle records of a binary STL, None for an ASCII file
+    file_size = os.path.getsize(file_path)
+    if file_size < HEADER_SIZE:
+        return None
+    with open(file_path, "rb") as f:
+        f.seek(80)
+        count = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    records = (file_size - HEADER_SIZE) // TRIANGLE_DTYPE.itemsize
+    if count == 0:
+        # Writers that stream the records may never fill in the count
+        return records
+    # ASCII files may also start with "solid", but their count is made of
+    # text bytes, at least 0x09090909, so the records never fit into the
+    # file. Bytes after the last record are padding some exporters add.
+    return count if count <= records else None
+
+
+def is_binary_stl(file_path):
+    return binary_triangle_count(file_path) is not None
+
+
+# One vertex line of an ASCII STL, the three coordinates are captured
+ASCII_VERTEX = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+# Bytes read at a time when streaming an ASCII file, about 50k triangles
+ASCII_BLOCK_SIZE = 8 * 1024 * 1024
+# Triangles welded at a time, the temporaries of a chunk take a few MB
+WELD_CHUNK_SIZE = 100000
+
+
+def map_binary_stl(file_path):
+    # Memory-map the triangle records, nothing is read until it is accessed.
+    # Padding or records beyond the count in the header are left out.
+    count = binary_triangle_count(file_path)
+    return np.memmap(file_path, dtype=TRIANGLE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def _equal_neighbours(rows):
+    return np.all(rows[1:] == rows[:-1], axis=1)
+
+
+def _unique_vertices(vertices):
+    # Unique rows of a (n, 3) float32 array in order of first appearance and
+    # the index of every row among them
+    bits = vertices.view(np.uint32)
+
+    # Sort a 64 bit hash of each vertex, equal vertices end up next to each
+    # other. The hash is built in place to keep the temporaries down.
+    key = bits[:, 0].astype(np.uint64)
+    key <<= np.uint64(32)
+    key |= bits[:, 1]
+    key *= np.uint64(0x9E3779B97F4A7C15)
+    key ^= bits[:, 2]
+    order = np.argsort(key)
+    key = key[order]
+    same_key = key[1:] == key[:-1]
+    del key
+    same_vertex = _equal_neighbours(bits[order])
+    if np.any(same_key != same_vertex):
+        # Hash collision, fall back to an exact (slower) sort on the raw bits
+        order = np.lexsort((bits[:, 2], bits[:, 1], bits[:, 0]))
+        same_vertex = _equal_neighbours(bits[order])
+    del same_key
+
+    # Number the groups of equal vertices
+    starts = np.concatenate(([True], ~same_vertex))
+    del same_vertex
+    group = np.cumsum(starts)
+    group -= 1
+    first_index = order[starts]
+    del starts
+
+    # Keep the points roughly in file order for better memory locality
+    rank = np.empty(len(first_index), dtype=np.int64)
+    rank[np.argsort(first_index)] = np.arange(len(first_index))
+
+    group = rank[group]
+    inverse = np.empty(len(vertices), dtype=np.int64)
+    inverse[order] = group
+    return vertices[np.sort(first_index)], inverse
+
+
+def weld_triangles(chunks, count, progress=None):
+    # Weld (k, 3, 3) chunks of triangles into points and faces. Only one chunk
+    # is held at a time, its vertices are first made unique within the chunk
+    # and those are welded across the chunks at the end.
+    local_faces = np.empty((count, 3), dtype=np.int32 if 3 * count < 2 ** 31 else np.int64)
+    unique_chunks = []
+    n_unique = 0
+    done = 0
+    for chunk in chunks:
+        chunk = chunk[:count - done]
+        if len(chunk) == 0:
+            break
+        # Adding zero turns -0.0 into 0.0 so both compare equal bit-wise
+        vertices = np.asarray(chunk, dtype=np.float32).reshape(-1, 3) + np.float32(0)
+        unique, inverse = _unique_vertices(vertices)
+        local_faces[done:done + len(chunk)] = (inverse + n_unique).reshape(-1, 3)
+        unique_chunks.append(unique)
+        n_unique += len(unique)
+        done += len(chunk)
+        if progress is not None:
+            progress(done, count)
+
+    if not unique_chunks:
+        return np.empty((0, 3), dtype=np.float32), np.empty((0, 3), dtype=np.int64)
+    vertices = np.concatenate(unique_chunks)
+    del unique_chunks
+    points, inverse = _unique_vertices(vertices)
+    del vertices
+
+    faces = np.empty((done, 3), dtype=np.int64)
+    for start in range(0, done, WELD_CHUNK_SIZE):
+        faces[start:start + WELD_CHUNK_SIZE] = inverse[local_faces[start:start + WELD_CHUNK_SIZE]]
+    return points, faces
+
+
+def weld_vertices(vertices):
+    triangles = np.asarray(vertices).reshape(-1, 3, 3)
+    chunks = (triangles[start:start + WELD_CHUNK_SIZE] for start in range(0, len(triangles), WELD_CHUNK_SIZE))
+    return weld_triangles(chunks, len(triangles))
+
+
+def iter_binary_triangles(file_path, chunk_size=100000):
+    # Read the records into one reused buffer, unlike the memory mapping the
+    # touched pages never add up in the resident set. A yielded chunk is only
+    # valid until the next one is read.
+    remaining = binary_triangle_count(file_path)
+    buffer = np.empty(chunk_size, dtype=TRIANGLE_DTYPE)
+    raw = buffer.view(np.uint8)
+    with open(file_path, "rb") as f:
+        f.seek(HEADER_SIZE)
+        while remaining > 0:
+            size = min(chunk_size, remaining) * TRIANGLE_DTYPE.itemsize
+            count = f.readinto(raw[:size]) // TRIANGLE_DTYPE.itemsize
+            if count == 0:
+                break
+            remaining -= count
+            yield buffer["vertices"][:count]
+
+
+def iter_ascii_triangles(file_path, block_size=ASCII_BLOCK_SIZE):
+    # Parse the vertex lines block by block, a block is cut at its last line
+    # break and the rest is carried over, as are vertices of a split facet
+    rest = b""
+    pending = np.empty((0, 3))
+    found = False
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            text = rest + block
+            if block:
+                cut = text.rfind(b"\n") + 1
+                text, rest = text[:cut], text[cut:]
+            vertices = np.array(ASCII_VERTEX.findall(text), dtype=np.float64).reshape(-1, 3)
+            if len(pending):
+                vertices = np.concatenate((pending, vertices))
+            whole = len(vertices) // 3 * 3
+            pending = vertices[whole:]
+            if whole:
+                found = True
+                yield vertices[:whole].reshape(-1, 3, 3)
+            if not block:
+                break
+    if not found and os.path.getsize(file_path) > 0:
+        # A truncated binary file would otherwise weigh 0 g without a word
+        raise ValueError(f"{file_path} contains no triangles, it is not a valid STL file")
+
+
+def iter_triangles(file_path, chunk_size=100000):
+    if is_binary_stl(file_path):
+        return iter_binary_triangles(file_path, chunk_size)
+    # ASCII chunks are as many facets as fit in a block of text
+    return iter_ascii_triangles(file_path)
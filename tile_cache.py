@@ -0,0 +1,546 @@
+import heapq
+import json
+import math
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+import vtk
+from PyQt5 import QtCore
+
+from mesh_cache import CACHE_DIR, evict_entries, file_key
+
+TILE_CACHE_DIR = os.path.join(CACHE_DIR, "tiles")
+# Disk the tile sets may take, apart from the one in use
+TILE_CACHE_SIZE_LIMIT = 20 * 1024 ** 3
+INDEX_FILE = "tiles.json"
+TILESET_VERSION = 1
+
+# Files at least this big are shown tile by tile instead of loaded whole
+OUT_OF_CORE_FILE_SIZE = 1024 ** 3
+# Triangles in a full resolution brick and in a decimated inner node
+LEAF_TRIANGLES = 200000
+NODE_TRIANGLES = 100000
+MAX_DEPTH = 6
+
+# Memory the resident tiles may take, and the largest error in pixels
+# before a node is replaced by its children
+TILE_MEMORY_BUDGET = 512 * 1024 ** 2
+MAX_SCREEN_ERROR = 2.0
+# Tiles read from disk per batch on the loader thread, the view is
+# selected again before the next batch
+MAX_LOADS_PER_UPDATE = 4
+
+
+def node_name(level, x, y, z):
+    return f"{level}_{x}_{y}_{z}"
+
+
+def typical_edge_length(points, faces):
+    # Edge of an equilateral triangle with the mean triangle area
+    corners = points[faces].astype(np.float64)
+    area = np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1).sum() / 2
+    return math.sqrt(4.0 / math.sqrt(3.0) * area / max(len(faces), 1))
+
+
+class TileSetBuilder:
+    # One-time pass that splits an STL into octree bricks: full resolution
+    # leaves, and inner nodes holding a decimated copy of their children
+    def __init__(self, file_path, tile_dir, progress=None):
+        self.file_path = file_path
+        self.tile_dir = tile_dir
+        self.progress = progress
+        self.nodes = {}
+
+    def _report(self, done, total):
+        if self.progress is not None:
+            self.progress(min(done, total), total)
+
+    def _save(self, name, points, faces):
+        np.save(os.path.join(self.tile_dir, name + "_points.npy"), points)
+        np.save(os.path.join(self.tile_dir, name + "_faces.npy"), faces.astype(np.int32))
+
+    def _load(self, name):
+        points = np.load(os.path.join(self.tile_dir, name + "_points.npy"))
+        faces = np.load(os.path.join(self.tile_dir, name + "_faces.npy")).astype(np.int64)
+        return points, faces
+
+    def _add_node(self, name, level, cell, points, faces, error, children):
+        from mesh_loader import mesh_to_polydata
+
+        self._save(name, points, faces)
+        low = self.lower + np.array(cell) * self.edge / 2 ** level
+        self.nodes[name] = {
+            "level": level,
+            "bounds": [float(v) for pair in zip(low, low + self.edge / 2 ** level) for v in pair],
+            "triangles": int(len(faces)),
+            "bytes": mesh_to_polydata(points, faces).GetActualMemorySize() * 1024 + faces.size * 4,
+            "error": float(error),
+            "children": children,
+            "parent": None,
+        }
+        for child in children:
+            self.nodes[child]["parent"] = name
+
+    def build(self):
+        import stl_reader
+        from mass_properties import chunk_sums, reduce_sums
+
+        expected = stl_reader.binary_triangle_count(self.file_path)
+        if expected is None:
+            # ASCII facets are about 170 bytes, only used for the progress bar
+            expected = os.path.getsize(self.file_path) // 170
+        # Progress in steps of triangles: two passes over the file, then the tree
+        total = 3 * max(expected, 1)
+
+        # Pass 1: count, bounds and mass properties, one chunk in memory
+        origin = None
+        partial_sums = []
+        count = 0
+        for chunk in stl_reader.iter_triangles(self.file_path):
+            if origin is None:
+                origin = np.array(chunk[0, 0], dtype=np.float64)
+            partial_sums.append(chunk_sums(chunk, origin))
+            count += len(chunk)
+            self._report(count, total)
+        self.mass_properties = reduce_sums(partial_sums, origin)
+        if count == 0:
+            raise ValueError(f"{self.file_path} has no triangles")
+        total = 3 * count
+
+        bounds = np.array(self.mass_properties.bounds)
+        self.lower = bounds[0::2]
+        # Bricks split the model box in half along every axis, so long thin
+        # parts are not left in a few crowded bricks
+        self.edge = np.maximum(bounds[1::2] - self.lower, 1e-6) * (1 + 1e-6)
+        depth = 0
+        while count / 8 ** depth > LEAF_TRIANGLES and depth < MAX_DEPTH:
+            depth += 1
+        cells = 2 ** depth
+
+        # Pass 2: append each triangle to the brick holding its center
+        done = 0
+        for chunk in stl_reader.iter_triangles(self.file_path):
+            centers = chunk.mean(axis=1)
+            index = np.clip(((centers - self.lower) / self.edge * cells).astype(np.int64), 0, cells - 1)
+            keys = (index[:, 0] * cells + index[:, 1]) * cells + index[:, 2]
+            order = np.argsort(keys, kind="stable")
+            keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            for start, stop in zip(starts, np.r_[starts[1:], len(keys)]):
+                raw_path = os.path.join(self.tile_dir, f"brick_{keys[start]}.raw")
+                with open(raw_path, "ab") as f:
+                    f.write(np.ascontiguousarray(chunk[order[start:stop]], dtype=np.float32).tobytes())
+            done += len(chunk)
+            self._report(count + done, total)
+
+        # Pass 3: weld the leaves
+        level_nodes = {}
+        for file_name in sorted(os.listdir(self.tile_dir)):
+            if not file_name.endswith(".raw"):
+                continue
+            key = int(file_name[6:-4])
+            cell = (key // (cells * cells), key // cells % cells, key % cells)
+            raw_path = os.path.join(self.tile_dir, file_name)
+            points, faces = stl_reader.weld_vertices(np.fromfile(raw_path, dtype=np.float32))
+            os.remove(raw_path)
+            name = node_name(depth, *cell)
+            self._add_node(name, depth, cell, points, faces, 0.0, [])
+            level_nodes[cell] = name
+            done += len(faces) // 2
+            self._report(count + done, total)
+
+        # Pass 4: every parent is its children welded together and decimated
+        for level in range(depth - 1, -1, -1):
+            parents = {}
+            for cell, name in level_nodes.items():
+                parents.setdefault(tuple(c // 2 for c in cell), []).append(name)
+            level_nodes = {}
+            for cell, children in sorted(parents.items()):
+                name = node_name(level, *cell)
+                points, faces, error = self._merge(children)
+                self._add_node(name, level, cell, points, faces, error, children)
+                level_nodes[cell] = name
+            done += count // (2 * max(depth, 1))
+            self._report(count + done, total)
+
+        root = node_name(0, 0, 0, 0)
+        with open(os.path.join(self.tile_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": TILESET_VERSION,
+                    "file_name": os.path.basename(self.file_path),
+                    "triangles": count,
+                    "depth": depth,
+                    "root": root,
+                    "mass_properties": self.mass_properties.to_dict(),
+                    "nodes": self.nodes,
+                },
+                f,
+            )
+        self._report(total, total)
+
+    def _merge(self, children):
+        import stl_reader
+        from lod import build_lod_levels
+        from mesh_loader import mesh_to_polydata, polydata_to_mesh
+
+        corners = []
+        for child in children:
+            points, faces = self._load(child)
+            corners.append(points[faces])
+        points, faces = stl_reader.weld_vertices(np.concatenate(corners))
+        error = max(self.nodes[child]["error"] for child in children)
+        if len(faces) <= NODE_TRIANGLES:
+            # Nothing to drop, the node looks exactly like its children
+            return points, faces, error
+
+        levels = build_lod_levels(mesh_to_polydata(points, faces), (NODE_TRIANGLES,))
+        if levels:
+            points, faces = polydata_to_mesh(levels[0])
+            points = np.array(points)
+            error += typical_edge_length(points, faces)
+        return points, faces, error
+
+
+class TileSet:
+    def __init__(self, tile_dir):
+        from mass_properties import MassProperties
+
+        self.tile_dir = tile_dir
+        with open(os.path.join(tile_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != TILESET_VERSION:
+            raise ValueError(f"Unknown tile set version in {tile_dir}")
+        self.nodes = index["nodes"]
+        self.root = index["root"]
+        self.triangles = index["triangles"]
+        self.mass_properties = MassProperties.from_dict(index["mass_properties"])
+        self.bounds = tuple(self.mass_properties.bounds)
+        # Read by the thread that opens the set, so there is always something to show
+        self.root_polydata = None
+
+    def load(self, name):
+        from mesh_loader import compute_cell_normals, mesh_to_polydata
+        from vtk.util import numpy_support
+
+        # Read fully, a resident tile is exactly what the budget counts
+        points = np.load(os.path.join(self.tile_dir, name + "_points.npy"))
+        faces = np.load(os.path.join(self.tile_dir, name + "_faces.npy")).astype(np.int64)
+        polydata = mesh_to_polydata(points, faces)
+        normals = numpy_support.numpy_to_vtk(compute_cell_normals(points, faces), deep=True)
+        normals.SetName("Normals")
+        polydata.GetCellData().SetNormals(normals)
+        return polydata
+
+
+def open_tileset(file_path, progress=None, cache_dir=TILE_CACHE_DIR, size_limit=TILE_CACHE_SIZE_LIMIT):
+    # The tiles are built once per file and found again by its key
+    tile_dir = os.path.join(cache_dir, file_key(file_path))
+    try:
+        tileset = TileSet(tile_dir)
+    except (OSError, ValueError, KeyError):
+        tileset = None
+
+    if tileset is None:
+        temp_dir = tile_dir + f".tmp{os.getpid()}"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        try:
+            TileSetBuilder(file_path, temp_dir, progress).build()
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        shutil.rmtree(tile_dir, ignore_errors=True)
+        os.replace(temp_dir, tile_dir)
+        tileset = TileSet(tile_dir)
+
+    # Touch the set so eviction sees it as recently used, older sets and
+    # builds left behind by a killed process go first
+    os.utime(os.path.join(tile_dir, INDEX_FILE))
+    evict_entries(cache_dir, INDEX_FILE, size_limit, keep=tile_dir)
+    tileset.root_polydata = tileset.load(tileset.root)
+    return tileset
+
+
+class TileCache:
+    # Resident tiles, least recently used first, evicted down to the budget
+    def __init__(self, tileset, memory_budget=TILE_MEMORY_BUDGET):
+        self.tileset = tileset
+        self.memory_budget = memory_budget
+        self.tiles = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+
+    def __contains__(self, name):
+        return name in self.tiles
+
+    def get(self, name):
+        self.tiles.move_to_end(name)
+        return self.tiles[name]
+
+    def add(self, name, polydata):
+        if name in self.tiles:
+            return
+        self.tiles[name] = polydata
+        self.sizes[name] = polydata.GetActualMemorySize() * 1024
+        self.total_bytes += self.sizes[name]
+
+    def evict(self, keep=()):
+        for name in list(self.tiles):
+            if self.total_bytes <= self.memory_budget:
+                break
+            if name in keep:
+                continue
+            del self.tiles[name]
+            self.total_bytes -= self.sizes.pop(name)
+
+    def clear(self):
+        self.tiles.clear()
+        self.sizes.clear()
+        self.total_bytes = 0
+
+
+def box_outside_frustum(bounds, planes):
+    # planes holds (a, b, c, d) rows facing inwards, a box is outside when
+    # its corner furthest along a plane normal is still behind that plane
+    bounds = np.asarray(bounds)
+    corner = np.where(planes[:, :3] >= 0, bounds[1::2], bounds[0::2])
+    return bool(np.any(np.einsum("ij,ij->i", planes[:, :3], corner) + planes[:, 3] < 0))
+
+
+def box_distance(bounds, position):
+    bounds = np.asarray(bounds)
+    nearest = np.clip(position, bounds[0::2], bounds[1::2])
+    return float(np.linalg.norm(nearest - position))
+
+
+class TileLoader(QtCore.QThread):
+    # Reads a batch of tiles off the GUI thread, each one is handed over
+    # as soon as it is ready
+    tile_loaded = QtCore.pyqtSignal(str, object)
+
+    def __init__(self, tileset, names, parent=None):
+        super(TileLoader, self).__init__(parent)
+        self.tileset = tileset
+        self.names = names
+
+    def run(self):
+        for name in self.names:
+            if self.isInterruptionRequested():
+                return
+            self.tile_loaded.emit(name, self.tileset.load(name))
+
+
+class TiledModel(QtCore.QObject):
+    # Shows the tiles a camera needs: inner nodes are replaced by their
+    # children while their error covers more than MAX_SCREEN_ERROR pixels
+    def __init__(
+        self,
+        renderer,
+        tileset,
+        layer,
+        request_render,
+        memory_budget=TILE_MEMORY_BUDGET,
+        max_screen_error=MAX_SCREEN_ERROR,
+        parent=None,
+    ):
+        super(TiledModel, self).__init__(parent)
+        self.renderer = renderer
+        self.tileset = tileset
+        self.layer = layer
+        self.request_render = request_render
+        self.max_screen_error = max_screen_error
+        self.cache = TileCache(tileset, memory_budget)
+        self.cache.add(tileset.root, tileset.root_polydata)
+        self.loader = None
+        self.view_state = None
+        # Tile name -> actor on screen
+        self.actors = {}
+        # Never rendered, every tile actor shares its property so a material
+        # change reaches all of them
+        self.material_actor = vtk.vtkActor()
+
+        # Camera moves are collected and handled once they settle a little
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(30)
+        self.timer.timeout.connect(self.update)
+        self.observer = self.renderer.AddObserver("StartEvent", self.on_render_started)
+
+    def set_memory_budget(self, memory_budget):
+        self.cache.memory_budget = memory_budget
+        self.view_state = None
+        self.timer.start()
+
+    def clear(self):
+        self.timer.stop()
+        if self.loader is not None:
+            # At most the tile being read is waited for
+            self.loader.requestInterruption()
+            self.loader.wait()
+            self.loader = None
+        self.renderer.RemoveObserver(self.observer)
+        for actor in self.actors.values():
+            self.layer.remove(actor)
+        self.actors = {}
+        self.cache.clear()
+
+    def _current_view_state(self):
+        camera = self.renderer.GetActiveCamera()
+        return (
+            camera.GetPosition(),
+            camera.GetFocalPoint(),
+            camera.GetViewUp(),
+            camera.GetViewAngle(),
+            camera.GetParallelScale(),
+            camera.GetParallelProjection(),
+            self.renderer.GetSize(),
+        )
+
+    def on_render_started(self, obj, event):
+        view_state = self._current_view_state()
+        if view_state != self.view_state:
+            self.view_state = view_state
+            self.timer.start()
+
+    def screen_error(self, node, camera, position, pixels_per_unit):
+        if node["error"] == 0.0:
+            return 0.0
+        if camera.GetParallelProjection():
+            return node["error"] * pixels_per_unit
+        distance = max(box_distance(node["bounds"], position), 1e-6)
+        return node["error"] * pixels_per_unit / distance
+
+    def select_nodes(self):
+        # Refine the node with the largest error first, as long as it stays
+        # visible, above the error limit and within the memory budget
+        nodes = self.tileset.nodes
+        camera = self.renderer.GetActiveCamera()
+        width, height = self.renderer.GetSize()
+        planes = [0.0] * 24
+        camera.GetFrustumPlanes(width / max(height, 1), planes)
+        planes = np.array(planes).reshape(6, 4)
+        position = np.array(camera.GetPosition())
+        if camera.GetParallelProjection():
+            pixels_per_unit = height / (2.0 * camera.GetParallelScale())
+        else:
+            pixels_per_unit = height / (2.0 * math.tan(math.radians(camera.GetViewAngle()) / 2.0))
+
+        root = self.tileset.root
+        selected = {root}
+        total_bytes = nodes[root]["bytes"]
+        queue = [(-self.screen_error(nodes[root], camera, position, pixels_per_unit), root)]
+        while queue:
+            error, name = heapq.heappop(queue)
+            if -error <= self.max_screen_error:
+                break
+            children = [
+                child for child in nodes[name]["children"]
+                if not box_outside_frustum(nodes[child]["bounds"], planes)
+            ]
+            children_bytes = sum(nodes[child]["bytes"] for child in children)
+            if total_bytes - nodes[name]["bytes"] + children_bytes > self.cache.memory_budget:
+                continue
+            selected.discard(name)
+            total_bytes += children_bytes - nodes[name]["bytes"]
+            for child in children:
+                selected.add(child)
+                child_error = self.screen_error(nodes[child], camera, position, pixels_per_unit)
+                heapq.heappush(queue, (-child_error, child))
+        return selected
+
+    def on_tile_loaded(self, name, polydata):
+        # Ignore tiles of a batch that has been replaced in the meantime
+        if self.sender() is self.loader:
+            self.cache.add(name, polydata)
+            self.timer.start()
+
+    def on_loader_finished(self):
+        if self.sender() is self.loader:
+            self.loader = None
+            self.update()
+
+    def update(self):
+        nodes = self.tileset.nodes
+        root = self.tileset.root
+        selected = self.select_nodes()
+
+        # Coarse tiles first, they cover the most screen. The next batch is
+        # chosen for the camera as it is once this one is in.
+        missing = sorted((name for name in selected if name not in self.cache), key=lambda n: nodes[n]["level"])
+        if missing and self.loader is None:
+            self.loader = TileLoader(self.tileset, missing[:MAX_LOADS_PER_UPDATE], self)
+            self.loader.tile_loaded.connect(self.on_tile_loaded)
+            self.loader.finished.connect(self.on_loader_finished)
+            self.loader.start()
+
+        # A tile still on disk is stood in for by its nearest resident ancestor
+        shown = set()
+        for name in selected:
+            while name not in self.cache:
+                name = nodes[name]["parent"]
+            shown.add(name)
+        for name in list(shown):
+            ancestor = nodes[name]["parent"]
+            while ancestor is not None:
+                if ancestor in shown:
+                    shown.discard(name)
+                    break
+                ancestor = nodes[ancestor]["parent"]
+
+        self.cache.evict(keep=shown | {root})
+        changed = False
+        for name in list(self.actors):
+            if name not in shown:
+                self.layer.remove(self.actors.pop(name))
+                changed = True
+        for name in shown:
+            if name not in self.actors:
+                mapper = vtk.vtkPolyDataMapper()
+                mapper.SetInputData(self.cache.get(name))
+                actor = vtk.vtkActor()
+                actor.SetMapper(mapper)
+                actor.SetProperty(self.material_actor.GetProperty())
+                self.actors[name] = actor
+                self.layer.add(actor)
+                changed = True
+            else:
+                self.cache.get(name)
+        if changed:
+            self.request_render()
+
+
+class TileSetWorker(QtCore.QThread):
+    # Same signals as the mesh load worker, so the window handles both alike
+    progress_changed = QtCore.pyqtSignal(int)
+    tileset_ready = QtCore.pyqtSignal(object)
+    load_failed = QtCore.pyqtSignal(str)
+    load_cancelled = QtCore.pyqtSignal()
+
+    def __init__(self, file_path, parent=None):
+        super(TileSetWorker, self).__init__(parent)
+        self.file_path = file_path
+
+    def run(self):
+        from mesh_loader import LoadCancelled
+
+        try:
+            tileset = open_tileset(self.file_path, progress=self._report_progress)
+            self.progress_changed.emit(100)
+            self.tileset_ready.emit(tileset)
+        except LoadCancelled:
+            self.load_cancelled.emit()
+        except Exception as ex:
+            self.load_failed.emit(str(ex))
+
+    def cancel(self):
+        self.requestInterruption()
+
+    def _report_progress(self, done, total):
+        from mesh_loader import LoadCancelled
+
+        if self.isInterruptionRequested():
+            raise LoadCancelled()
+        self.progress_changed.emit(int(done * 100 / max(total, 1)))
@@ -0,0 +1,66 @@
+# Transparency modes: "fast" always blends with the order independent pass,
+# "quality" depth peels still frames as long as they fit the budget
+TRANSPARENCY_MODES = ("fast", "quality")
+
+# How long a still frame may take before depth peeling is given up
+STILL_FRAME_BUDGET = 0.5
+MAX_PEELS = 4
+
+
+class TransparencyController:
+    def __init__(self, renderer, mode="fast", still_budget=STILL_FRAME_BUDGET, max_peels=MAX_PEELS):
+        self.renderer = renderer
+        self.mode = mode
+        self.still_budget = still_budget
+        self.translucent = False
+        self.interacting = False
+        # Last still frame time with depth peeling, None until measured
+        self.peel_frame_time = None
+
+        self.renderer.SetMaximumNumberOfPeels(max_peels)
+        self.renderer.SetOcclusionRatio(0.1)
+        self.renderer.AddObserver("EndEvent", self.on_render_end)
+
+    def set_mode(self, mode):
+        if mode not in TRANSPARENCY_MODES:
+            raise ValueError(f"Unknown transparency mode: {mode}")
+        self.mode = mode
+        self.peel_frame_time = None
+        self.apply()
+
+    def reset(self):
+        # A new model gets a new chance at depth peeling
+        self.peel_frame_time = None
+        self.apply()
+
+    def set_opacity(self, opacity):
+        self.translucent = opacity < 1.0
+        self.apply()
+
+    def watch(self, interactor_style):
+        interactor_style.AddObserver("StartInteractionEvent", self.on_start_interaction)
+        interactor_style.AddObserver("EndInteractionEvent", self.on_end_interaction)
+
+    def use_depth_peeling(self):
+        # Moving frames stay on the cheap pass, the LOD controller shrinks
+        # the model on top of that
+        if not self.translucent or self.interacting or self.mode != "quality":
+            return False
+        return self.peel_frame_time is None or self.peel_frame_time <= self.still_budget
+
+    def apply(self):
+        self.renderer.SetUseDepthPeeling(self.use_depth_peeling())
+
+    def on_render_end(self, obj, event):
+        if self.renderer.GetUseDepthPeeling():
+            self.peel_frame_time = self.renderer.GetLastRenderTimeInSeconds()
+            # Too slow, the next frame falls back to blending
+            self.apply()
+
+    def on_start_interaction(self, obj, event):
+        self.interacting = True
+        self.apply()
+
+    def on_end_interaction(self, obj, event):
+        self.interacting = False
+        self.apply()
@@ -0,0 +1,67 @@
+import vtk
+from PyQt5 import QtCore
+
+
+def turntable_camera_path(camera, speed=3, turn=359):
+    # Same motion the recorder always used: a full turn around the model,
+    # then a full turn over the top, one frame every `speed` degrees
+    camera_copy = vtk.vtkCamera()
+    camera_copy.DeepCopy(camera)
+
+    path = []
+    angle = 0
+    while angle < turn * 2:
+        if angle < turn:
+            # Rotate around Y-axis
+            camera_copy.Azimuth(speed)
+        else:
+            # Rotate around X-axis
+            camera_copy.OrthogonalizeViewUp()
+            camera_copy.Elevation(speed)
+        path.append(
+            (camera_copy.GetPosition(), camera_copy.GetFocalPoint(), camera_copy.GetViewUp())
+        )
+        angle += speed
+    return path
+
+
+class TurntableRecorder(QtCore.QThread):
+    progress_changed = QtCore.pyqtSignal(int)
+    recording_finished = QtCore.pyqtSignal(str)
+    recording_failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, offscreen, camera_path, encoder, parent=None):
+        # offscreen must not have rendered yet, its context belongs to this thread
+        super(TurntableRecorder, self).__init__(parent)
+        self.offscreen = offscreen
+        self.camera_path = camera_path
+        self.encoder = encoder
+
+    def run(self):
+        camera = self.offscreen.renderer.GetActiveCamera()
+        closed = False
+        try:
+            for index, (position, focal_point, view_up) in enumerate(self.camera_path):
+                if self.isInterruptionRequested():
+                    break
+                camera.SetPosition(position)
+                camera.SetFocalPoint(focal_point)
+                camera.SetViewUp(view_up)
+                self.offscreen.renderer.ResetCameraClippingRange()
+
+                # The encoder thread picks the frame up while the next one renders
+                self.encoder.write_frame(self.offscreen.render_image())
+                self.progress_changed.emit(int((index + 1) * 100 / len(self.camera_path)))
+            closed = True
+            self.encoder.close()
+            self.recording_finished.emit(self.encoder.file_name)
+        except Exception as ex:
+            self.recording_failed.emit(str(ex))
+        finally:
+            if not closed:
+                # Stop the writer thread and ffmpeg, the error is already reported
+                try:
+                    self.encoder.close()
+                except Exception:
+                    pass
+            self.offscreen.finalize()
@@ -1,40 +1,76 @@
 import os
+import queue
 import subprocess
+import sys
+import threading
+
+import numpy as np
+
 
 def open_folder_in_explorer(folder_path):
     try:
-        subprocess.Popen(['explorer', folder_path], shell=True)
+        if sys.platform.startswith("win"):
+            os.startfile(folder_path)
+        elif sys.platform == "darwin":
+            subprocess.Popen(["open", folder_path])
+        else:
+            subprocess.Popen(["xdg-open", folder_path])
     except Exception as e:
         print(f"Error: {e}")
 
 
-def encode(file_name=None):
-
-    import subprocess
+class VideoEncoder:
+    def __init__(self, file_name=None, fps=24):
+        import imageio
 
-    ffmpeg_path = "ffmpeg.exe"
-    input_pattern = "frame_%03d.png"
-    output_file = file_name if file_name else "output.mp4"
-    working_directory = os.path.join(os.getcwd(), 'temp_images')
-    ffmpeg_path = os.path.join(os.path.dirname(__file__), 'ffmpeg.exe')
+        self.file_name = file_name if file_name else "output.mp4"
+        # imageio-ffmpeg ships its own ffmpeg binary, frames are piped straight into it
+        self.writer = imageio.get_writer(
+            self.file_name,
+            format="FFMPEG",
+            fps=fps,
+            codec="libx264",
+            pixelformat="yuv420p",
+            macro_block_size=2,
+        )
 
-    # Build the FFmpeg command
-    ffmpeg_command = [
-        ffmpeg_path,
-        "-y",  # Add the -y option to force overwrite
-        "-framerate", "24",
-        "-start_number", "1",
-        "-i", input_pattern,
-        "-c:v", "libx264",
-        "-pix_fmt", "yuv420p",
-        output_file
-    ]
+    def write_frame(self, frame):
+        # frame is a (height, width, 3) uint8 RGB array
+        self.writer.append_data(frame)
 
-    # Execute the FFmpeg command
-    try:
-        subprocess.run(ffmpeg_command, check=True, cwd=working_directory)
+    def close(self):
+        self.writer.close()
         print("Conversion completed successfully.")
-        
-        open_folder_in_explorer(working_directory)
-    except subprocess.CalledProcessError as e:
-        print(f"Error during conversion: {e}")
+
+
+class ThreadedVideoEncoder(VideoEncoder):
+    def __init__(self, file_name=None, fps=24, queue_size=8):
+        super(ThreadedVideoEncoder, self).__init__(file_name, fps)
+        # A bounded queue keeps the renderer at most a few frames ahead of ffmpeg
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._encode, daemon=True)
+        self.thread.start()
+
+    def _encode(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is None:
+                try:
+                    super(ThreadedVideoEncoder, self).write_frame(frame)
+                except Exception as ex:
+                    # Keep draining the queue so the producer never blocks
+                    self.error = ex
+
+    def write_frame(self, frame):
+        # Copy the frame, the renderer reuses its buffer for the next one
+        self.frames.put(np.array(frame, order="C"))
+
+    def close(self):
+        self.frames.put(None)
+        self.thread.join()
+        super(ThreadedVideoEncoder, self).close()
+        if self.error is not None:
+            raise self.error
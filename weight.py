@@ -1,37 +1,68 @@
-def get_weight_text(file_name):
-
-    import numpy as np
-    from stl import mesh
-    import sys
-    # Load the STL file
-    stl_file = mesh.Mesh.from_file(file_name)
-
-    # Calculate the volume, center of mass, and inertia tensor
-    volume, _, _ = stl_file.get_mass_properties()
-    volume_grams = volume / 1000.0  # Convert milligrams to grams
-    print(f"Volume of STL file: {volume_grams} grams")
-
-    # Densities of gold for different karats (g/cm³)
-    density_9k = 11.0
-    density_14k = 13.0
-    density_18k = 15.6
-    density_21k = 17.0
-    density_22k = 17.5
-
-    # Calculate the weight of gold for different karats
-    weight_9k = volume_grams * density_9k
-    weight_14k = volume_grams * density_14k
-    weight_18k = volume_grams * density_18k
-    weight_21k = volume_grams * density_21k
-    weight_22k = volume_grams * density_22k
-    rv = {}
-    rv['9k'] =  weight_9k
-    rv['14k'] = weight_14k
-    rv['18k'] = weight_18k
-    rv['21k'] = weight_21k
-    rv['22K'] =  weight_22k
-    return rv   
-    
+def get_mass_properties(mesh_data):
+    from mass_properties import compute_mass_properties
+
+    # Computed once per mesh, unless it is already known from the cache
+    if mesh_data.mass_properties is None:
+        mesh_data.mass_properties = compute_mass_properties(mesh_data.points, mesh_data.faces)
+        mesh_data.volume = mesh_data.mass_properties.volume
+    return mesh_data.mass_properties
+
+
+def get_weight_table(volume, metals=None):
+    from materials import load_metals
+
+    if metals is None:
+        metals = load_metals()
+    volume_cm3 = volume / 1000.0  # mm³ to cm³
+    # Weight in grams for every metal, densities are g/cm³
+    return {metal["name"]: volume_cm3 * metal["density"] for metal in metals}
+
+
+def get_weight_text(file_name, mesh_data=None, metals=None, stream=False, workers=1):
+    if mesh_data is None and stream:
+        from mass_properties import stream_mass_properties
+
+        # Read the file in fixed-size chunks, nothing is kept but the sums
+        properties = stream_mass_properties(file_name, workers=workers)
+    else:
+        if mesh_data is None:
+            from mesh_loader import load_mesh
+
+            # Load the STL file
+            mesh_data = load_mesh(file_name)
+        properties = get_mass_properties(mesh_data)
+
+    print(f"Volume of STL file: {properties.volume / 1000.0} cm³")
+    if properties.bounds is not None:
+        xmin, xmax, ymin, ymax, zmin, zmax = properties.bounds
+        print(f"Size: {xmax - xmin:.2f} x {ymax - ymin:.2f} x {zmax - zmin:.2f} mm")
+    if properties.watertight is False:
+        print(
+            f"{file_name} is not watertight ({properties.boundary_edges} open, "
+            f"{properties.non_manifold_edges} non-manifold edges), the weight is approximate"
+        )
+    return get_weight_table(properties.volume, metals)
+
+
+def format_weight_text(weights, mass_properties=None):
+    text = ""
+    for key, value in weights.items():
+        text += key + ": {:.2f}".format(value) + "\n"
+    if mass_properties is not None and mass_properties.watertight is False:
+        text += "Not watertight, weight approximate\n"
+    return text
+
+
 if __name__ == "__main__":
-    import sys
-    print(get_weight_text(sys.argv[1]))
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Weight of an STL model in every metal")
+    parser.add_argument("stl")
+    parser.add_argument("--stream", action="store_true", help="read the file in chunks with constant memory")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="processes for a streamed binary file")
+    args = parser.parse_args()
+    if args.workers != 1 and not args.stream:
+        # The viewer and batch reports weigh the mesh they already loaded,
+        # only a streamed pass reads the file again and can be split
+        parser.error("-j/--workers only applies with --stream")
+    print(get_weight_text(args.stl, stream=args.stream, workers=args.workers))